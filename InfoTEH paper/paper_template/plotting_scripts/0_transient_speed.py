@@ -1,7 +1,7 @@
-import scipy.io
 import matplotlib.pyplot as plt
 from pathlib import Path
-import numpy as np
+
+from bldc_tools.trace_store import read_window, channel_time
 
 # --- CONFIGURATION ---
 DATA_FOLDER = Path('mat_files_v2')
@@ -10,6 +10,7 @@ DATA_FOLDER = Path('mat_files_v2')
 STEP_TIME_S = 1.0       # The absolute time the step happens in simulation (seconds)
 PLOT_WINDOW_MS = 40     # How many ms to show after the step
 PRE_STEP_MS = 5         # How many ms to show before the step (start of the plot)
+PAD_MS = 1              # Extra data loaded on each side so lines run off the axes
 
 # Define styles
 STYLES = {
@@ -20,6 +21,7 @@ STYLES = {
 PLOT_ORDER = ['LUT', '3_step', '6_step']
 
 def load_mat_data(strategy, mtpa_state):
+    """Loads only the plotted window (plus PAD_MS) of a run."""
     filename = f"{strategy}_speed_transient_MTPA_{mtpa_state}.mat"
     file_path = DATA_FOLDER / filename
     
@@ -27,25 +29,14 @@ def load_mat_data(strategy, mtpa_state):
         print(f"Skipping: {filename} (not found)")
         return None
 
+    t_start = STEP_TIME_S - PRE_STEP_MS / 1000
+    t_stop = STEP_TIME_S + PLOT_WINDOW_MS / 1000
     try:
-        return scipy.io.loadmat(str(file_path), squeeze_me=True)
+        return read_window(file_path, ['omega_r', 'T_e'], t_start, t_stop, pad=PAD_MS / 1000)
     except Exception as e:
         print(f"Error loading {filename}: {e}")
         return None
 
-def get_aligned_time(ref_time, data_signal):
-    """
-    Fixes mismatched dimensions by generating a synthetic time vector
-    if the data length doesn't match the reference time length.
-    """
-    len_t = len(ref_time)
-    len_d = len(data_signal)
-
-    if len_t == len_d:
-        return ref_time
-    
-    return np.linspace(ref_time[0], ref_time[-1], len_d)
-
 def plot_scenario(mtpa_state):
     print(f"\nProcessing MTPA_{mtpa_state}...")
     
@@ -70,14 +61,13 @@ def plot_scenario(mtpa_state):
         
         has_data = True
         
-        # Extract Raw Data
-        raw_time = data['time']       
+        # Extract Raw Data (already cut to the plot window)
         speed = data['omega_r']
         torque = data['T_e']
         
-        # --- Generate aligned time vectors (ms) ---
-        t_speed_abs = get_aligned_time(raw_time, speed) * 1000
-        t_torque_abs = get_aligned_time(raw_time, torque) * 1000
+        # --- Time vectors (ms); channels logged at another rate get their own ---
+        t_speed_abs = channel_time(data, 'omega_r') * 1000
+        t_torque_abs = channel_time(data, 'T_e') * 1000
         
         # --- NORMALIZE TIME ---
         # Shift time so that 'abs_start_ms' becomes 0
@@ -1,7 +1,7 @@
-import scipy.io
 import matplotlib.pyplot as plt
 from pathlib import Path
-import numpy as np
+
+from bldc_tools.trace_store import read_window, channel_time
 
 # --- CONFIGURATION ---
 DATA_FOLDER = Path('mat_files_v2')
@@ -11,6 +11,7 @@ OUTPUT_FOLDER = Path('figures')
 STEP_TIME_S = 1.0       # Absolute time of step in simulation
 PLOT_WINDOW_MS = 40     # Duration to show after step
 PRE_STEP_MS = 5         # Duration to show before step
+PAD_MS = 1              # Extra data loaded on each side of the window
 
 # Define styles
 STYLES = {
@@ -21,6 +22,7 @@ STYLES = {
 PLOT_ORDER = ['LUT', '3_step', '6_step']
 
 def load_mat_data(strategy, mtpa_state):
+    """Loads only the plotted window (plus PAD_MS) of a run."""
     # CHANGED: Now looks for 'torque_transient' files
     filename = f"{strategy}_torque_transient_MTPA_{mtpa_state}.mat"
     file_path = DATA_FOLDER / filename
@@ -29,24 +31,14 @@ def load_mat_data(strategy, mtpa_state):
         print(f"Skipping: {filename} (not found)")
         return None
 
+    t_start = STEP_TIME_S - PRE_STEP_MS / 1000
+    t_stop = STEP_TIME_S + PLOT_WINDOW_MS / 1000
     try:
-        return scipy.io.loadmat(str(file_path), squeeze_me=True)
+        return read_window(file_path, ['omega_r', 'T_e'], t_start, t_stop, pad=PAD_MS / 1000)
     except Exception as e:
         print(f"Error loading {filename}: {e}")
         return None
 
-def get_aligned_time(ref_time, data_signal):
-    """
-    Generates synthetic time vector if lengths mismatch.
-    """
-    len_t = len(ref_time)
-    len_d = len(data_signal)
-
-    if len_t == len_d:
-        return ref_time
-    
-    return np.linspace(ref_time[0], ref_time[-1], len_d)
-
 def plot_scenario(mtpa_state):
     print(f"\nProcessing Torque Transient Plot for MTPA_{mtpa_state}...")
     
@@ -70,14 +62,13 @@ def plot_scenario(mtpa_state):
         
         has_data = True
         
-        # Extract Raw Data
-        raw_time = data['time']       
+        # Extract Raw Data (already cut to the plot window)
         speed = data['omega_r'] # Actual Speed
         torque = data['T_e']    # Torque
         
-        # --- Generate aligned time vectors (ms) ---
-        t_speed_abs = get_aligned_time(raw_time, speed) * 1000
-        t_torque_abs = get_aligned_time(raw_time, torque) * 1000
+        # --- Time vectors (ms); channels logged at another rate get their own ---
+        t_speed_abs = channel_time(data, 'omega_r') * 1000
+        t_torque_abs = channel_time(data, 'T_e') * 1000
         
         # --- NORMALIZE TIME ---
         t_speed_norm = t_speed_abs - abs_start_ms
@@ -0,0 +1,7 @@
+"""
+Shared helpers for the BLDC Hall-sensor analysis scripts.
+
+Scripts in the sub-folders (speed_estimate/, python_scripts/, figures/) add the
+plotting_scripts folder to sys.path and import the modules directly, e.g.
+    from bldc_tools.trace_store import open_trace
+"""
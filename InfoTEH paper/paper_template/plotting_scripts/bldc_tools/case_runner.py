@@ -0,0 +1,46 @@
+"""
+Runs independent analysis cases (one .mat run each) in a process pool.
+
+The worker function gets one case dict and does its own loading, estimation
+and plotting, then returns a small summary dict (best shift, MSE, ideal LUT,
+...). Summaries come back in the same order as the cases.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _init_worker():
+    # Workers only save figures, never show them
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _safe_call(func, case):
+    try:
+        return func(case)
+    except Exception as e:
+        name = case.get('name', '?') if isinstance(case, dict) else '?'
+        print(f"Case {name} failed: {e}")
+        return {'name': name, 'error': str(e)}
+
+
+def run_cases(func, cases, max_workers=None):
+    """
+    Calls func(case) for every case, in parallel processes.
+    max_workers=None uses one worker per case up to the CPU count;
+    max_workers=1 runs in this process (handy for debugging).
+    func must be a module-level function so it can be pickled.
+    """
+    cases = list(cases)
+    if not cases:
+        return []
+    if max_workers is None:
+        max_workers = min(len(cases), os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        _init_worker()
+        return [_safe_call(func, c) for c in cases]
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_safe_call, func, c) for c in cases]
+        return [f.result() for f in futures]
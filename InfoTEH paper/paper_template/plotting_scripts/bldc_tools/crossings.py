@@ -0,0 +1,76 @@
+"""
+Level / zero-crossing detection with linear interpolation, on whole arrays.
+
+A falling crossing is a sample pair with y[i] > level >= y[i+1], a rising one
+y[i] <= level < y[i+1] (the conventions of the old per-sample loops in
+figures/). The crossing time is interpolated between time[i] and time[i+1].
+
+debounce() drops crossings that follow the previously kept one by less than
+a minimum interval (noise around the zero of a PWM current), which is what
+splits a run into electrical cycles in cycle_starts().
+"""
+import numpy as np
+
+
+def zero_crossings(time, y, level=0.0, direction='rising'):
+    """
+    Crossings of `level` by y.
+    direction: 'rising', 'falling' or 'both'.
+    Returns (times, idx), idx being the sample just before each crossing.
+    """
+    time = np.asarray(time, dtype=float)
+    y = np.asarray(y, dtype=float) - level
+    y0, y1 = y[:-1], y[1:]
+
+    if direction == 'rising':
+        mask = (y0 <= 0) & (y1 > 0)
+    elif direction == 'falling':
+        mask = (y0 > 0) & (y1 <= 0)
+    elif direction == 'both':
+        mask = ((y0 <= 0) & (y1 > 0)) | ((y0 > 0) & (y1 <= 0))
+    else:
+        raise ValueError(f"Unknown direction '{direction}'")
+
+    idx = np.flatnonzero(mask)
+    frac = y0[idx] / (y0[idx] - y1[idx])
+    return time[idx] + frac * (time[idx + 1] - time[idx]), idx
+
+
+def debounce(times, min_interval, t_prev=None, check_times=None):
+    """
+    Keeps a crossing only if it comes more than min_interval after the last
+    kept one (t_prev: last kept time before these, None keeps the first).
+    check_times, if given, is what gets compared against the last kept time
+    (e.g. the sample time before each crossing); it must be sorted too.
+    Returns a boolean mask over times.
+    """
+    times = np.asarray(times, dtype=float)
+    check = times if check_times is None else np.asarray(check_times, dtype=float)
+    n = len(times)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+
+    first_ok = t_prev is None or check[0] - t_prev > min_interval
+    if first_ok and np.all(check[1:] - times[:-1] > min_interval):
+        keep[:] = True
+        return keep
+
+    # next_ok[j]: first crossing far enough after crossing j. Walking that chain
+    # costs one step per kept crossing, not per sample.
+    next_ok = np.searchsorted(check, times + min_interval, side='right')
+    j = 0 if first_ok else int(np.searchsorted(check, t_prev + min_interval, side='right'))
+    while j < n:
+        keep[j] = True
+        j = next_ok[j]
+    return keep
+
+
+def cycle_starts(time, y, min_freq=5.0):
+    """
+    Rising zero crossings of y at least half a period of min_freq apart.
+    Returns (idx, times); consecutive idx bound one electrical cycle.
+    """
+    times, idx = zero_crossings(time, y, direction='rising')
+    keep = debounce(times, 0.5 / min_freq, check_times=np.asarray(time, dtype=float)[idx])
+    return idx[keep], times[keep]
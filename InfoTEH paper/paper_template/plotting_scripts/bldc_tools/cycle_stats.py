@@ -0,0 +1,82 @@
+"""
+Per-cycle torque-per-amp (Kt) statistics.
+
+Given cycle boundaries (sample indices, e.g. from crossings.cycle_starts), the
+per-cycle sums of i^2, e*i and omega_r come from np.add.reduceat in one pass
+over the run, giving for every electrical cycle
+
+    I_rms = sqrt(mean(i_a^2))
+    P     = 3 * mean(e_a * i_a)          (balanced three-phase power)
+    w_m   = mean(omega_r) / pole_pairs
+    Kt    = |P / w_m / I_rms|
+"""
+import numpy as np
+
+from .crossings import cycle_starts
+
+POLE_PAIRS = 4
+
+# Cycles are only scored above these (same limits as 2_tpa_comparison.py)
+MIN_SAMPLES = 6
+MIN_I_RMS = 0.01
+MIN_W_M = 1e-3
+
+
+def cycle_stats(i_a, e_a, omega_r, bounds, pole_pairs=POLE_PAIRS, time=None):
+    """
+    Statistics of the cycles bounds[k]:bounds[k+1] (len(bounds) - 1 cycles).
+    Returns a dict of arrays: start, stop, n, i_rms, power, w_m, torque, kt,
+    valid (enough samples, current and speed) and t_mid if time is given.
+    kt and torque are NaN where not valid.
+    """
+    bounds = np.asarray(bounds, dtype=np.int64)
+    i_a = np.asarray(i_a, dtype=float)
+    e_a = np.asarray(e_a, dtype=float)
+    omega_r = np.asarray(omega_r, dtype=float)
+
+    if len(bounds) < 2:
+        empty = np.array([])
+        out = {k: empty for k in ('i_rms', 'power', 'w_m', 'torque', 'kt')}
+        out.update(start=bounds[:0], stop=bounds[:0], n=bounds[:0], valid=np.zeros(0, dtype=bool))
+        if time is not None:
+            out['t_mid'] = empty
+        return out
+
+    start, stop = bounds[:-1], bounds[1:]
+    n = stop - start
+
+    # reduceat sums bounds[k]:bounds[k+1]; the last segment runs to the end and is dropped
+    def seg_mean(x):
+        return np.add.reduceat(x, bounds)[:-1] / n
+
+    i_rms = np.sqrt(seg_mean(i_a**2))
+    power = 3.0 * seg_mean(e_a * i_a)
+    w_m = seg_mean(omega_r) / pole_pairs
+
+    valid = (n >= MIN_SAMPLES) & (i_rms > MIN_I_RMS) & (np.abs(w_m) > MIN_W_M)
+    torque = np.full(len(n), np.nan)
+    torque[valid] = power[valid] / w_m[valid]
+    kt = np.full(len(n), np.nan)
+    kt[valid] = np.abs(torque[valid] / i_rms[valid])
+
+    out = {'start': start, 'stop': stop, 'n': n, 'i_rms': i_rms, 'power': power,
+           'w_m': w_m, 'torque': torque, 'kt': kt, 'valid': valid}
+    if time is not None:
+        time = np.asarray(time, dtype=float)
+        out['t_mid'] = 0.5 * (time[start] + time[stop - 1])
+    return out
+
+
+def kt_trace(time, i_a, e_a, omega_r, min_freq=None, pole_pairs=POLE_PAIRS):
+    """
+    Kt of every electrical cycle of a run (cycles split on rising i_a crossings).
+    Crossings closer than half a period of min_freq are merged. The default
+    holds off for 3/4 of the shortest electrical period in omega_r, which also
+    skips the noise at the falling crossing half a period later; for runs with
+    a wide speed range pass min_freq explicitly.
+    """
+    if min_freq is None:
+        f_max = max(np.max(np.abs(omega_r)) / (2 * np.pi), 1.0)
+        min_freq = f_max / 1.5
+    bounds, _ = cycle_starts(time, i_a, min_freq=min_freq)
+    return cycle_stats(i_a, e_a, omega_r, bounds, pole_pairs=pole_pairs, time=time)
@@ -0,0 +1,89 @@
+"""
+Exponential-decay (tau) fits by closed-form least squares.
+
+For y = A * exp(-t / tau), log(y) is a straight line in t. The fit over the
+samples of a window with y above min_level is the ordinary least-squares line
+
+    b = (n S_ty - S_t S_y) / (n S_tt - S_t^2),   a = (S_y - b S_t) / n
+
+with S_* the sums of t, log(y) and their products over those samples, and
+tau = -1 / b. The sums come from prefix sums along time, so every window of
+every run costs two lookups once the prefix sums are built: many runs (rows
+of y) and many windows are fitted in one call, without scikit-learn.
+"""
+import numpy as np
+
+MIN_LEVEL = 0.1
+MIN_POINTS = 10
+
+
+def _prefix(x):
+    """Prefix sums along the last axis, with a leading zero column."""
+    out = np.zeros(x.shape[:-1] + (x.shape[-1] + 1,))
+    np.cumsum(x, axis=-1, out=out[..., 1:])
+    return out
+
+
+def fit_decay(t, y, windows, min_level=MIN_LEVEL, min_points=MIN_POINTS):
+    """
+    Fits log(y) = a + b * t on each (t_start, t_end) window of each run.
+    t: sorted 1-D time (any unit, tau comes out in the same unit).
+    y: 1-D trace or 2-D array (runs x samples) on the time base t.
+    windows: one (t_start, t_end) pair or a list of them (inclusive).
+    Returns a dict of arrays shaped (runs, windows), squeezed like the inputs:
+        tau        - time constant -1 / b (NaN if fewer than min_points samples)
+        amp        - exp(a), the fitted value at t = 0
+        rmse       - rms residual of the fit in log(y)
+        n          - samples used
+    """
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    single_run = y.ndim == 1
+    y = np.atleast_2d(y)[:, :len(t)]
+    t = t[:y.shape[1]]
+    win = np.asarray(windows, dtype=float)
+    single_win = win.ndim == 1
+    win = np.atleast_2d(win)
+
+    # Centre t so the sums of t^2 do not swamp the slope on long runs
+    t0 = 0.5 * (t[0] + t[-1])
+    tc = t - t0
+    used = y > min_level
+    ly = np.where(used, np.log(np.where(used, y, 1.0)), 0.0)
+    m = used.astype(float)
+
+    lo = np.searchsorted(t, win[:, 0], side='left')
+    hi = np.searchsorted(t, win[:, 1], side='right')
+
+    def window_sums(x):
+        p = _prefix(x)
+        return p[:, hi] - p[:, lo]
+
+    n = window_sums(m)
+    s_t = window_sums(m * tc)
+    s_tt = window_sums(m * tc**2)
+    s_y = window_sums(ly)
+    s_ty = window_sums(ly * tc)
+    s_yy = window_sums(ly**2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        b = (n * s_ty - s_t * s_y) / (n * s_tt - s_t**2)
+        a = (s_y - b * s_t) / n
+        sse = s_yy - a * s_y - b * s_ty
+        rmse = np.sqrt(np.maximum(sse, 0.0) / n)
+        tau = -1.0 / b
+
+    ok = n >= max(min_points, 2)
+    out = {
+        'tau': np.where(ok, tau, np.nan),
+        'amp': np.where(ok, np.exp(a - b * t0), np.nan),
+        'rmse': np.where(ok, rmse, np.nan),
+        'n': n.astype(np.int64),
+    }
+    for k, v in out.items():
+        if single_win:
+            v = v[:, 0]
+        if single_run:
+            v = v[0]
+        out[k] = v
+    return out
@@ -0,0 +1,66 @@
+"""
+Synchronous-frame demodulation of phase quantities against theta_r.
+
+For x = A * cos(theta_r + phi) (plus harmonics and PWM ripple),
+
+    z = LPF(2 * x * exp(-j * theta_r)) = A * exp(j * phi)
+
+so a zero-phase low-pass of the quadrature products gives the amplitude |z|
+and phase angle(z) of the fundamental at every sample, without band-pass
+filters or zero-crossing searches. The low-pass must sit well below 2 f_e:
+at low speed (start-up) the 2 f_e ripple leaks through.
+
+phase_lag() does this for i_a and e_a; their difference is the Δφ of
+1_phase_alignment.py as a continuous track over the whole run.
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter
+
+from .fundamental import sample_rate, sosfiltfilt_chunked
+
+DEFAULT_CUTOFF_HZ = 20.0
+
+
+@lru_cache(maxsize=32)
+def _lowpass(fs, cutoff, order):
+    return butter(order, cutoff, btype='lowpass', fs=fs, output='sos')
+
+
+def demodulate(time, x, theta_r, cutoff_hz=DEFAULT_CUTOFF_HZ, order=2, chunk_size=500_000):
+    """
+    Complex envelope A * exp(j * phi) of x relative to theta_r (electrical rad).
+    """
+    n = min(len(time), len(x), len(theta_r))
+    fs = sample_rate(np.asarray(time[:n], dtype=float))
+    sos = _lowpass(round(float(fs), 6), float(cutoff_hz), int(order))
+    overlap = int(10 * fs / cutoff_hz)
+
+    theta = np.asarray(theta_r[:n], dtype=float)
+    x = np.asarray(x[:n], dtype=float)
+    re = sosfiltfilt_chunked(sos, 2 * x * np.cos(theta), chunk_size, overlap)
+    im = sosfiltfilt_chunked(sos, -2 * x * np.sin(theta), chunk_size, overlap)
+    return re + 1j * im
+
+
+def phase_lag(time, i_a, e_a, theta_r, cutoff_hz=DEFAULT_CUTOFF_HZ, order=2):
+    """
+    Amplitude and phase tracks of i_a and e_a, and the lag between them.
+    Returns a dict of arrays (one value per sample):
+        amp_i, amp_e      - fundamental amplitudes
+        phase_i, phase_e  - phases relative to theta_r (rad)
+        dphi              - phase of i_a minus phase of e_a, wrapped to (-pi, pi]
+                            (negative: current lags the EMF)
+    """
+    z_i = demodulate(time, i_a, theta_r, cutoff_hz, order)
+    z_e = demodulate(time, e_a, theta_r, cutoff_hz, order)
+    n = min(len(z_i), len(z_e))
+    z_i, z_e = z_i[:n], z_e[:n]
+    return {
+        'amp_i': np.abs(z_i),
+        'amp_e': np.abs(z_e),
+        'phase_i': np.angle(z_i),
+        'phase_e': np.angle(z_e),
+        'dphi': np.angle(z_i * np.conj(z_e)),
+    }
@@ -0,0 +1,151 @@
+"""
+Derived channels (dq currents, torque estimates) computed once per run.
+
+Each derived signal is registered once in DERIVED with the raw channels it
+needs. The first request computes it over the whole run (vectorized) and saves
+it next to the converted channels:
+
+    mat_files/.trace_cache/<run name>/derived/i_q.npy
+    mat_files/.trace_cache/<run name>/derived/i_q.json    (source sha256, version)
+
+Later requests memory-map the saved array, as long as the sha256 of the .mat
+file and the definition's version still match. Bump 'version' when a formula
+changes.
+
+open_channels() mixes raw and derived channels in one dict, so the result can
+go through trace_store.slice_window like a raw run.
+"""
+import json
+import os
+
+import numpy as np
+
+from .trace_store import cache_dir, open_trace, source_hash
+
+POLE_PAIRS = 4
+
+# Speeds below this (rad/s) give zero torque instead of dividing by ~0
+MIN_SPEED = 1.0
+
+DERIVED = {}
+
+
+def derived(name, inputs, version=1):
+    """Registers func(*input arrays) as the derived channel `name`."""
+    def register(func):
+        DERIVED[name] = {'inputs': list(inputs), 'func': func, 'version': version}
+        return func
+    return register
+
+
+def _safe_divide(num, den, min_den=MIN_SPEED):
+    out = np.zeros_like(num, dtype=float)
+    mask = np.abs(den) > min_den
+    out[mask] = num[mask] / den[mask]
+    return out
+
+
+# --- Definitions ---
+
+@derived('i_d', ['i_a', 'i_b', 'i_c', 'theta_r'])
+def calc_i_d(i_a, i_b, i_c, theta_r):
+    """Amplitude-invariant Park d-axis current from the three phase currents."""
+    return (2 / 3) * (i_a * np.cos(theta_r)
+                      + i_b * np.cos(theta_r - 2 * np.pi / 3)
+                      + i_c * np.cos(theta_r + 2 * np.pi / 3))
+
+
+@derived('i_q', ['i_a', 'i_b', 'theta_r'])
+def calc_i_q(i_a, i_b, theta_r):
+    """Clarke (i_c = -i_a - i_b) + Park q-axis current."""
+    i_alpha = i_a
+    i_beta = (i_a + 2 * i_b) / np.sqrt(3)
+    return -i_alpha * np.sin(theta_r) + i_beta * np.cos(theta_r)
+
+
+@derived('T_e_iq', ['i_a', 'i_b', 'theta_r', 'e_q', 'omega_r'])
+def calc_torque_iq(i_a, i_b, theta_r, e_q, omega_r):
+    """T_e = 1.5 * i_q * e_q / omega_r (e_q / omega_r being the flux linkage)."""
+    return _safe_divide(1.5 * calc_i_q(i_a, i_b, theta_r) * e_q, omega_r)
+
+
+@derived('T_e_iq_rotor_speed', ['i_a', 'i_b', 'theta_r', 'e_q', 'rotor_speed'])
+def calc_torque_iq_rotor_speed(i_a, i_b, theta_r, e_q, rotor_speed):
+    """T_e_iq for runs that log rotor_speed but not omega_r."""
+    return calc_torque_iq(i_a, i_b, theta_r, e_q, rotor_speed)
+
+
+@derived('T_e_power', ['e_a', 'i_a', 'omega_r'])
+def calc_torque_power(e_a, i_a, omega_r):
+    """T_e = 3 * e_a * i_a / omega_m (per-phase active power, balanced phases)."""
+    return _safe_divide(3.0 * e_a * i_a, omega_r / POLE_PAIRS)
+
+
+# --- Cache ---
+
+def _paths(mat_path, name):
+    folder = cache_dir(mat_path) / 'derived'
+    return folder, folder / f'{name}.npy', folder / f'{name}.json'
+
+
+def _cache_key(mat_path, name):
+    spec = DERIVED[name]
+    return {'source': source_hash(mat_path), 'version': spec['version'], 'inputs': spec['inputs']}
+
+
+def derived_channel(mat_path, name, force=False):
+    """
+    Memory-mapped derived channel `name`, computed and saved on first use.
+    Raises KeyError if the run lacks one of its inputs.
+    Inputs of different lengths are cut to the shortest one.
+    """
+    if name not in DERIVED:
+        raise KeyError(f"Unknown derived channel '{name}'")
+    folder, npy_path, key_path = _paths(mat_path, name)
+    key = _cache_key(mat_path, name)
+
+    if not force and npy_path.exists():
+        try:
+            with open(key_path, 'r') as f:
+                if json.load(f) == key:
+                    return np.load(npy_path, mmap_mode='r')
+        except (OSError, ValueError):
+            # Unreadable or truncated key / array (JSONDecodeError is a
+            # ValueError): recompute
+            pass
+
+    spec = DERIVED[name]
+    raw = open_trace(mat_path, spec['inputs'])
+    missing = [k for k in spec['inputs'] if k not in raw]
+    if missing:
+        raise KeyError(f"Cannot derive '{name}': channels {missing} not found")
+    n = min(len(raw[k]) for k in spec['inputs'])
+    values = spec['func'](*(np.asarray(raw[k][:n], dtype=float) for k in spec['inputs']))
+
+    folder.mkdir(parents=True, exist_ok=True)
+    tmp = folder / f'{name}.{os.getpid()}.tmp.npy'
+    np.save(tmp, values)
+    os.replace(tmp, npy_path)
+    # Key written last, so an interrupted save is recomputed next time
+    tmp = folder / f'{name}.{os.getpid()}.tmp.json'
+    with open(tmp, 'w') as f:
+        json.dump(key, f)
+    os.replace(tmp, key_path)
+    return np.load(npy_path, mmap_mode='r')
+
+
+def open_channels(mat_path, channels):
+    """
+    open_trace that also serves derived channels.
+    Raw channels win over derived ones of the same name; derived channels
+    whose inputs are missing are left out, like missing raw channels.
+    """
+    data = open_trace(mat_path, channels)
+    for name in channels:
+        if name in data or name not in DERIVED:
+            continue
+        try:
+            data[name] = derived_channel(mat_path, name)
+        except KeyError:
+            continue
+    return data
@@ -0,0 +1,69 @@
+"""
+Edge detection on the ISR trigger channels, plus sub-sample edge timing.
+
+find_rising_edges returns integer sample indices, so every dt built from it is
+quantized to the sample period. rising_edge_times and sector_crossing_times
+return fractional timestamps by linear interpolation between the two samples
+around each crossing. Only sector_crossing_times gives real sub-sample timing:
+it works from theta_r, so it keeps its accuracy on decimated traces. On the
+0/1 ISR pulses rising_edge_times always lands half-way between the two
+samples, a constant half-sample shift that leaves dt just as quantized.
+"""
+import numpy as np
+
+
+def find_rising_edges(signal):
+    """Finds indices where signal transitions from low (<=0.5) to high (>0.5)."""
+    return np.where((signal[:-1] <= 0.5) & (signal[1:] > 0.5))[0] + 1
+
+
+def rising_edge_times(time, signal, threshold=0.5):
+    """
+    Interpolated times where signal rises through threshold.
+    Returns (edge_times, edge_indices); edge_indices match find_rising_edges.
+    Only useful on analog-valued signals: on a 0/1 trigger (hardware_ISR)
+    every edge sits at the sample midpoint, so the times are no finer than
+    the sample grid. Use sector_crossing_times on theta_r for sub-sample
+    edges, e.g. on decimated runs.
+    """
+    signal = np.asarray(signal, dtype=float)
+    idx = np.flatnonzero((signal[:-1] <= threshold) & (signal[1:] > threshold)) + 1
+    s0, s1 = signal[idx - 1], signal[idx]
+    t0 = np.asarray(time[idx - 1], dtype=float)
+    t1 = np.asarray(time[idx], dtype=float)
+    frac = (threshold - s0) / (s1 - s0)
+    return t0 + frac * (t1 - t0), idx
+
+
+def sector_boundaries(lut_angles_deg, offset_deg=0.0):
+    """Sector start angles (rad) for a set of sector widths, starting at offset_deg."""
+    widths = np.deg2rad(np.asarray(lut_angles_deg, dtype=float))
+    return np.deg2rad(offset_deg) + np.concatenate(([0.0], np.cumsum(widths)[:-1]))
+
+
+def sector_crossing_times(time, theta_r, boundaries_rad):
+    """
+    Interpolated times where the electrical angle crosses any sector boundary
+    (in either direction).
+    Returns (edge_times, boundary_index, direction) sorted by time, where
+    direction is +1 for forward and -1 for reverse rotation.
+    """
+    theta = np.unwrap(np.asarray(theta_r, dtype=float))
+    time = np.asarray(time, dtype=float)
+    b = np.asarray(boundaries_rad, dtype=float)[:, None]
+
+    # Boundary j is crossed whenever (theta - b_j) / 2pi passes an integer
+    u = (theta[None, :] - b) / (2 * np.pi)
+    cyc = np.floor(u)
+    step = np.diff(cyc, axis=1)
+    j, i = np.nonzero(step)
+
+    direction = np.sign(step[j, i]).astype(int)
+    # Integer that was crossed: the new cycle for forward, the old one for reverse
+    k = np.where(direction > 0, cyc[j, i + 1], cyc[j, i])
+    u0, u1 = u[j, i], u[j, i + 1]
+    frac = (k - u0) / (u1 - u0)
+    t_edge = time[i] + frac * (time[i + 1] - time[i])
+
+    order = np.argsort(t_edge, kind='stable')
+    return t_edge[order], j[order], direction[order]
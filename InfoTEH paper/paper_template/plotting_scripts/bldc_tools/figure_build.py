@@ -0,0 +1,166 @@
+"""
+Incremental build of the paper figures.
+
+Each figure is a dict
+    {'name': ..., 'script': 'figures/3_startup.py',
+     'inputs': ['mat_files/*_from_startup.mat', ...],   # paths or glob patterns
+     'outputs': ['figures/3_startup.png'],
+     'args': [...]}                                      # optional
+with paths relative to the plotting_scripts folder.
+
+The key of a figure is a sha256 over its script source, the bldc_tools sources,
+its args and the contents of its input files (a missing input counts too, so a
+new run appearing triggers a rebuild). Keys of the last successful builds are
+kept in .figure_build.json; a figure is re-rendered only if its key changed or
+an output is missing. Content hashes of the (large) .mat files are remembered by
+size / mtime, so unchanged runs are not re-read.
+
+Stale figures run as separate `python <script>` processes (Agg backend, so
+plt.show() returns at once), several at a time.
+"""
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+STATE_NAME = '.figure_build.json'
+TOOLS_DIR = Path(__file__).resolve().parent
+
+
+def _file_hash(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cached_hash(path, memo):
+    """Content hash of a file, reused while its size and mtime are unchanged."""
+    st = os.stat(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    entry = memo.get(str(path))
+    if entry is None or entry['stamp'] != stamp:
+        entry = {'stamp': stamp, 'sha256': _file_hash(path)}
+        memo[str(path)] = entry
+    return entry['sha256']
+
+
+def _expand(root, patterns):
+    """(pattern, sorted matching paths) for every input pattern."""
+    out = []
+    for pat in patterns:
+        matches = sorted(glob.glob(str(root / pat)))
+        out.append((pat, matches))
+    return out
+
+
+def figure_key(fig, root, memo):
+    """sha256 over everything the figure depends on."""
+    root = Path(root)
+    h = hashlib.sha256()
+    h.update(_cached_hash(root / fig['script'], memo).encode())
+    for src in sorted(TOOLS_DIR.glob('*.py')):
+        h.update(_cached_hash(src, memo).encode())
+    h.update(json.dumps(fig.get('args', [])).encode())
+    for pat, matches in _expand(root, fig.get('inputs', [])):
+        h.update(pat.encode())
+        if not matches:
+            h.update(b'<missing>')
+        for path in matches:
+            h.update(os.path.relpath(path, root).encode())
+            h.update(_cached_hash(path, memo).encode())
+    return h.hexdigest()
+
+
+def _load_state(root):
+    try:
+        with open(Path(root) / STATE_NAME, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault('figures', {})
+    state.setdefault('hashes', {})
+    return state
+
+
+def _save_state(root, state):
+    path = Path(root) / STATE_NAME
+    tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _is_stale(fig, root, key, state):
+    if state['figures'].get(fig['name']) != key:
+        return True
+    return any(not (Path(root) / out).exists() for out in fig.get('outputs', []))
+
+
+def _render(fig, root):
+    """Runs one figure script. Returns (ok, seconds, output text)."""
+    root = Path(root)
+    env = dict(os.environ, MPLBACKEND='Agg')
+    cmd = [sys.executable, str(root / fig['script'])] + [str(a) for a in fig.get('args', [])]
+
+    t0 = time.time()
+    proc = subprocess.run(cmd, cwd=str(root), env=env, capture_output=True, text=True)
+    seconds = time.time() - t0
+
+    # Most scripts print their errors and exit normally, so also check that
+    # every output was (re)written during this run
+    ok = proc.returncode == 0
+    for out in fig.get('outputs', []):
+        path = root / out
+        if not path.exists() or path.stat().st_mtime < t0 - 1:
+            ok = False
+    return ok, seconds, proc.stdout + proc.stderr
+
+
+def build(figures, root, names=None, force=False, max_workers=None, dry_run=False):
+    """
+    Re-renders the figures whose key changed (all of them with force=True).
+    names restricts the build to those figure names.
+    Returns a list of {'name', 'status', 'seconds'} in figure order, status
+    being 'up to date', 'stale' (dry run), 'built' or 'failed'.
+    """
+    root = Path(root)
+    state = _load_state(root)
+    memo = state['hashes']
+    if names:
+        unknown = set(names) - {f['name'] for f in figures}
+        if unknown:
+            raise KeyError(f"Unknown figures: {sorted(unknown)}")
+        figures = [f for f in figures if f['name'] in names]
+
+    keys = {f['name']: figure_key(f, root, memo) for f in figures}
+    todo = [f for f in figures if force or _is_stale(f, root, keys[f['name']], state)]
+    results = {f['name']: {'name': f['name'], 'status': 'up to date', 'seconds': 0.0} for f in figures}
+
+    if dry_run:
+        for f in todo:
+            results[f['name']]['status'] = 'stale'
+        _save_state(root, state)
+        return [results[f['name']] for f in figures]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {f['name']: pool.submit(_render, f, root) for f in todo}
+        for name, fut in futures.items():
+            ok, seconds, log = fut.result()
+            results[name].update(status='built' if ok else 'failed', seconds=seconds)
+            if ok:
+                state['figures'][name] = keys[name]
+            else:
+                state['figures'].pop(name, None)
+                print(f"--- {name} failed ---\n{log}")
+
+    _save_state(root, state)
+    return [results[f['name']] for f in figures]
@@ -0,0 +1,47 @@
+"""
+First-order exponential (IIR) filters shared by the speed-estimation scripts.
+
+    y[n] = alpha * x[n] + (1 - alpha) * y[n-1]
+
+implemented with scipy.signal.lfilter. The filter is seeded with the first
+sample (y[0] = x[0]) like the original Python loops, or with a carried-over
+previous output (as done with dt_filt_store in the firmware model).
+"""
+import numpy as np
+from scipy.signal import lfilter
+
+
+def exp_filter(x, alpha, y_prev=None):
+    """
+    Filters a 1-D sequence for a single alpha.
+    y_prev is the filter output before x[0]; if None, y[0] = x[0].
+    """
+    x = np.asarray(x, dtype=float)
+    if len(x) == 0:
+        return x.copy()
+    if y_prev is None:
+        y_prev = x[0]
+    b = [alpha]
+    a = [1.0, -(1.0 - alpha)]
+    # With the transposed direct form, y[0] = b0*x[0] + zi  ->  zi = (1 - alpha) * y_prev
+    zi = [(1.0 - alpha) * y_prev]
+    y, _ = lfilter(b, a, x, zi=zi)
+    return y
+
+
+def apply_low_pass(data, alpha=0.05):
+    """
+    Simple IIR Low Pass Filter (seeded with the first sample).
+    If alpha is an array of K values, returns a (K, N) array, one row per alpha.
+    This is a convenience loop, one lfilter call per alpha (each alpha has
+    its own coefficients, so they cannot share one call); the samples are
+    never looped over in Python.
+    """
+    data = np.asarray(data, dtype=float)
+    if np.ndim(alpha) == 0:
+        return exp_filter(data, float(alpha))
+    alphas = np.asarray(alpha, dtype=float).ravel()
+    out = np.empty((len(alphas), len(data)))
+    for k, a in enumerate(alphas):
+        out[k] = exp_filter(data, a)
+    return out
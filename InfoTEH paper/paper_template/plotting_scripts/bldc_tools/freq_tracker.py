@@ -0,0 +1,98 @@
+"""
+Fundamental frequency tracking with sliding single-bin DFTs.
+
+For a bin frequency f_k the sliding DFT over the last N samples is
+
+    S_k[n] = sum_{m=n-N}^{n-1} x[m] * exp(-j 2 pi f_k m / fs)
+
+and the recursive update S_k[n+1] = S_k[n] + x[n] w^n - x[n-N] w^(n-N) is just a
+difference of one prefix sum, so every window of the run costs O(N) per bin.
+
+track_frequency() evaluates a small bank of bins spaced 1 / window apart at
+hop-spaced windows, picks the strongest bin per window and refines the
+frequency from the phase advance of that bin over half a window (lag L):
+
+    f0 = f_k + wrap(angle(S_k[n] * conj(S_k[n-L]))) / (2 pi * L / fs)
+
+Half a window keeps the advance within +-pi/2 for |f0 - f_k| <= half a bin,
+while being long enough that leakage of the negative-frequency image (a few
+percent of the bin) does not swamp it.
+
+The amplitude is corrected for the rectangular-window leakage at f0 - f_k.
+Unlike a whole-run zero-crossing count or theta slope, this follows speed
+transients; the result can drive fundamental.fundamental_tracking or the
+cycle hold-off of cycle_stats.kt_trace.
+"""
+import numpy as np
+
+from .fundamental import sample_rate
+
+
+def _dirichlet(delta, n_win, fs):
+    """|sum_{m<N} exp(j 2 pi delta m / fs)| (gain of an off-bin tone)."""
+    x = np.pi * delta / fs
+    with np.errstate(invalid='ignore', divide='ignore'):
+        g = np.abs(np.sin(n_win * x) / np.sin(x))
+    return np.where(np.abs(x) < 1e-12, float(n_win), g)
+
+
+def track_frequency(time, x, window_s=0.02, hop_s=0.001, f_max=500.0, f_min=None):
+    """
+    f0(t), amplitude and phase of the fundamental of x, per window.
+    f_min defaults to one bin (1 / window_s); f_max bounds the bin bank.
+    Returns a dict of arrays, one value per window:
+        t      - window centre time
+        f0     - fundamental frequency (Hz)
+        amp    - amplitude of the fundamental
+        phase  - phase of the fundamental at the window centre (rad, cosine)
+    """
+    time = np.asarray(time, dtype=float)
+    x = np.asarray(x, dtype=float)
+    n = min(len(time), len(x))
+    fs = sample_rate(time[:n])
+    n_win = max(int(round(window_s * fs)), 2)
+    hop = max(int(round(hop_s * fs)), 1)
+    if n < n_win + hop:
+        empty = np.array([])
+        return {'t': empty, 'f0': empty, 'amp': empty, 'phase': empty}
+
+    x = x[:n] - np.mean(x[:n])
+    ends = np.arange(n_win, n + 1, hop)
+    m = np.arange(n)
+    bin_hz = fs / n_win
+    f_min = bin_hz if f_min is None else max(f_min, bin_hz)
+    bins = np.arange(np.ceil(f_min / bin_hz), np.floor(min(f_max, fs / 2) / bin_hz) + 1) * bin_hz
+
+    # Sliding DFT of every bin at every window end, from one prefix sum per bin
+    S = np.empty((len(bins), len(ends)), dtype=complex)
+    for k, f_k in enumerate(bins):
+        prefix = np.concatenate(([0.0], np.cumsum(x * np.exp(-2j * np.pi * f_k * m / fs))))
+        S[k] = prefix[ends] - prefix[ends - n_win]
+
+    best = np.argmax(np.abs(S), axis=0)
+    cols = np.arange(len(ends))
+    S_now = S[best, cols]
+
+    # Phase advance over `lag` windows, backwards (forwards for the first ones)
+    lag = min(max(int(round(n_win / 2 / hop)), 1), len(ends) - 1)
+    back = cols >= lag
+    other = np.where(back, cols - lag, np.minimum(cols + lag, len(ends) - 1))
+    dphi = np.angle(S_now * np.conj(S[best, other]))
+    dphi[~back] = -dphi[~back]
+    f0 = bins[best] + dphi / (2 * np.pi * lag * hop / fs)
+
+    delta = f0 - bins[best]
+    amp = 2 * np.abs(S_now) / _dirichlet(delta, n_win, fs)
+
+    # angle(S) is the phase at the window start seen through bin f_k, plus the
+    # drift of delta over the window; convert to the phase at the centre
+    centre = ends - n_win + (n_win - 1) / 2
+    phase = np.angle(S_now * np.exp(2j * np.pi * bins[best] * centre / fs))
+
+    t_centre = time[0] + centre / fs
+    return {'t': t_centre, 'f0': f0, 'amp': amp, 'phase': phase}
+
+
+def omega_from_track(track, time):
+    """Electrical rad/s on the sample grid of `time`, interpolated from a track."""
+    return 2 * np.pi * np.interp(time, track['t'], track['f0'])
@@ -0,0 +1,129 @@
+"""
+Hall-sensor emulator (Python port of mark/.../hall_sensor.m).
+
+Each sensor k sees theta_r - phi_k and is high on a fixed 180 deg window:
+    H1: [-90, 90] deg,  H2: [30, 210] deg,  H3: [150, 330] deg
+HALL_STATE = 4*H1 + 2*H2 + H3 steps through 4, 6, 2, 3, 1, 5 (States I..VI,
+see controller_6step_120.m) for forward rotation.
+
+phi_k are the per-sensor misalignments (phi_A_deg, phi_B_deg, phi_C_deg in
+setup_motor_params.m). Everything is vectorized over samples and, for the
+edge times, over many offset combinations at once.
+"""
+import numpy as np
+
+from .edges import sector_crossing_times
+
+# Hall codes of States I..VI (controller_6step_120.m)
+HALL_SEQUENCE = np.array([4, 6, 2, 3, 1, 5])
+
+# Sector number 1..6 of each Hall code (index = code, 0 and 7 are invalid)
+HALL_TO_SECTOR = np.array([0, 5, 3, 4, 1, 6, 2, 0])
+
+# Angles (rad, sensor frame) where each sensor switches: (sensor, angle)
+_TRANSITIONS = (
+    (0, -np.pi / 2), (0, np.pi / 2),
+    (1, np.pi / 6), (1, 7 * np.pi / 6),
+    (2, 5 * np.pi / 6), (2, 11 * np.pi / 6),
+)
+
+
+def hall_signals(theta_r, phi_rad=(0.0, 0.0, 0.0)):
+    """
+    Sensor outputs H1, H2, H3 as uint8.
+    phi_rad has shape (..., 3) and theta_r shape (N,) or (..., N);
+    the result has shape (..., 3, N).
+    """
+    theta = np.asarray(theta_r, dtype=float)[..., None, :]
+    phi = np.asarray(phi_rad, dtype=float)[..., None]
+    x = np.mod(theta - phi, 2 * np.pi)
+
+    H = np.empty(x.shape, dtype=np.uint8)
+    H[..., 0, :] = (x[..., 0, :] <= np.pi / 2) | (x[..., 0, :] >= 3 * np.pi / 2)
+    H[..., 1, :] = (x[..., 1, :] >= np.pi / 6) & (x[..., 1, :] <= 7 * np.pi / 6)
+    H[..., 2, :] = (x[..., 2, :] >= 5 * np.pi / 6) & (x[..., 2, :] <= 11 * np.pi / 6)
+    return H
+
+
+def hall_state(theta_r, phi_rad=(0.0, 0.0, 0.0)):
+    """HALL_STATE = 4*H1 + 2*H2 + H3 (shape (..., len(theta_r)))."""
+    H = hall_signals(theta_r, phi_rad).astype(np.int64)
+    return 4 * H[..., 0, :] + 2 * H[..., 1, :] + H[..., 2, :]
+
+
+def transition_angles(phi_rad):
+    """Electrical angles (rad) of the 6 Hall transitions, shape (..., 6)."""
+    phi = np.asarray(phi_rad, dtype=float)
+    sensor = np.array([s for s, _ in _TRANSITIONS])
+    angle = np.array([a for _, a in _TRANSITIONS])
+    return phi[..., sensor] + angle
+
+
+def emulate_hall(time, theta_r, phi_deg=(0.0, 0.0, 0.0)):
+    """
+    Hall data for one set of sensor offsets (degrees).
+    Returns a dict with
+        hall_state    - Hall code per sample (4, 6, 2, 3, 1, 5)
+        sector        - sector number 1..6 (State I..VI) per sample
+        hardware_ISR  - 1 on the sample where the Hall state changes
+        edge_times    - interpolated transition times
+        edge_state    - Hall code entered at each transition
+    """
+    phi = np.deg2rad(np.asarray(phi_deg, dtype=float))
+    state = hall_state(theta_r, phi)
+
+    hw = np.zeros(len(state), dtype=np.uint8)
+    hw[1:] = state[1:] != state[:-1]
+
+    bounds = transition_angles(phi)
+    t_edge, j, direction = sector_crossing_times(time, theta_r, bounds)
+    # State entered just past the boundary in the direction of travel
+    edge_state = hall_state(bounds[j] + 1e-9 * direction, phi)
+
+    return {
+        'hall_state': state,
+        'sector': HALL_TO_SECTOR[state],
+        'hardware_ISR': hw,
+        'edge_times': t_edge,
+        'edge_state': edge_state,
+    }
+
+
+def hall_edge_times(time, theta_r, phi_deg):
+    """
+    Exact Hall transition times for many offset combinations at once.
+    phi_deg has shape (K, 3). Assumes forward rotation (theta_r non-decreasing
+    after unwrapping), so each transition angle maps to a time by interpolation.
+    Returns (edge_times, edge_state), both (K, M) and padded with NaN / 0.
+    """
+    theta = np.unwrap(np.asarray(theta_r, dtype=float))
+    time = np.asarray(time, dtype=float)
+    if np.any(np.diff(theta) < 0):
+        raise ValueError("hall_edge_times needs forward rotation; use emulate_hall per offset set")
+
+    phi = np.deg2rad(np.atleast_2d(np.asarray(phi_deg, dtype=float)))
+    bounds = transition_angles(phi)                                   # (K, 6)
+
+    # Every revolution of every boundary that falls inside the run
+    n_lo = int(np.floor((theta[0] - bounds.max()) / (2 * np.pi)))
+    n_hi = int(np.ceil((theta[-1] - bounds.min()) / (2 * np.pi)))
+    revs = 2 * np.pi * np.arange(n_lo, n_hi + 1)
+    angles = (bounds[:, :, None] + revs).reshape(len(phi), -1)        # (K, 6 * n_rev)
+    order = np.argsort(angles, axis=1)
+    angles = np.take_along_axis(angles, order, axis=1)
+    trans_j = np.take_along_axis(np.tile(np.arange(6).repeat(len(revs)), (len(phi), 1)), order, axis=1)
+
+    inside = (angles > theta[0]) & (angles <= theta[-1])
+    M = int(inside.sum(axis=1).max()) if inside.size else 0
+
+    t_all = np.interp(angles, theta, time)
+    s_all = hall_state(np.take_along_axis(bounds, trans_j, axis=1) + 1e-9, phi)
+
+    # Left-align the edges of each combination, pad the rest
+    rows, _ = np.nonzero(inside)
+    cols = (np.cumsum(inside, axis=1) - 1)[inside]
+    edge_times = np.full((len(phi), M), np.nan)
+    edge_state = np.zeros((len(phi), M), dtype=np.int64)
+    edge_times[rows, cols] = t_all[inside]
+    edge_state[rows, cols] = s_all[inside]
+    return edge_times, edge_state
@@ -0,0 +1,106 @@
+"""
+Closed-form LUT shift search.
+
+For a candidate assignment where interval k uses LUT angle a, the squared error
+against the true speed w_k is
+
+    (a / dt_k - w_k)^2 = a^2 / dt_k^2 - 2 a w_k / dt_k + w_k^2
+
+so grouping the intervals by their position in the 6-edge cycle (k % 6) and
+summing 1/dt^2, w/dt and w^2 once is enough to score every cyclic shift (and the
+reversed LUT) with a small (candidates x 6) matrix product.
+"""
+import numpy as np
+
+from .lut_speed import MIN_DT
+
+
+def _interval_sums(time, edge_indices, omega_r, n_lut, min_dt):
+    """Per-phase (k % n_lut) sums needed to score any LUT assignment."""
+    edge_indices = np.asarray(edge_indices)
+    t_edges = np.asarray(time[edge_indices], dtype=float)
+    dt = np.diff(t_edges)
+    keep = dt >= min_dt
+    seq = np.flatnonzero(keep)
+    dt = dt[keep]
+
+    # True speed sampled where each estimate becomes available (same as the scripts)
+    w_true = np.interp(t_edges[1:][keep], time, omega_r)
+    inv_dt = 1.0 / dt
+    phase = seq % n_lut
+
+    def per_phase(x):
+        return np.bincount(phase, weights=x, minlength=n_lut)
+
+    return {
+        'count': np.bincount(phase, minlength=n_lut).astype(float),
+        'inv_dt': per_phase(inv_dt),
+        'inv_dt2': per_phase(inv_dt**2),
+        'w': per_phase(w_true),
+        'w_inv_dt': per_phase(w_true * inv_dt),
+        'w2': per_phase(w_true**2),
+    }
+
+
+def _candidate_indices(n_lut, reverse):
+    """LUT index used by each phase p for every candidate (direction, shift)."""
+    p = np.arange(n_lut)
+    shifts = np.arange(n_lut)[:, None]
+    fwd = (p[None, :] + shifts) % n_lut
+    if not reverse:
+        return fwd, np.ones(n_lut, dtype=int)
+    rev = (shifts - p[None, :]) % n_lut
+    return np.vstack([fwd, rev]), np.repeat([1, -1], n_lut)
+
+
+def align_lut(time, edge_indices, omega_r, lut_angles_deg, reverse=True, min_dt=MIN_DT):
+    """
+    Finds the LUT shift (and direction) that best matches omega_r.
+
+    Interval k uses LUT[(k + shift) % 6] for direction +1 and
+    LUT[(shift - k) % 6] for direction -1 (reversed rotation).
+
+    Returns a dict with
+        shift, direction, mse       - best candidate
+        errors                      - MSE of every candidate, shape (n_dir, 6)
+        sector_residuals            - mean (estimate - true) per LUT index
+        sector_rmse                 - RMS error per LUT index
+    or None if there are fewer than two edges.
+    """
+    lut_rad = np.deg2rad(np.asarray(lut_angles_deg, dtype=float))
+    n_lut = len(lut_rad)
+    if len(edge_indices) < 2:
+        return None
+
+    S = _interval_sums(time, edge_indices, omega_r, n_lut, min_dt)
+    n_total = S['count'].sum()
+    if n_total == 0:
+        return None
+
+    idx, directions = _candidate_indices(n_lut, reverse)
+    a = lut_rad[idx]                                 # (candidates, phase)
+    sq_err = a**2 * S['inv_dt2'] - 2 * a * S['w_inv_dt'] + S['w2']
+    mse = sq_err.sum(axis=1) / n_total
+
+    best = int(np.argmin(mse))
+    best_idx = idx[best]
+
+    # Per-LUT-index statistics for the winning candidate
+    count = np.zeros(n_lut)
+    res_sum = np.zeros(n_lut)
+    sq_sum = np.zeros(n_lut)
+    np.add.at(count, best_idx, S['count'])
+    np.add.at(res_sum, best_idx, a[best] * S['inv_dt'] - S['w'])
+    np.add.at(sq_sum, best_idx, sq_err[best])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sector_residuals = res_sum / count
+        sector_rmse = np.sqrt(sq_sum / count)
+
+    return {
+        'shift': best % n_lut,
+        'direction': int(directions[best]),
+        'mse': float(mse[best]),
+        'errors': mse.reshape(-1, n_lut),
+        'sector_residuals': sector_residuals,
+        'sector_rmse': sector_rmse,
+    }
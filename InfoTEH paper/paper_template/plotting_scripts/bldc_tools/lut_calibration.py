@@ -0,0 +1,173 @@
+"""
+Ideal LUT calibration from recorded runs.
+
+The ideal angle of an interval is the mean true speed over the interval times
+its duration. The mean comes from a prefix sum of omega_r, so each interval
+costs O(1) instead of an np.mean over a slice.
+
+For transient runs, or when edges fall between 1 us samples, the swept angle
+can instead be taken from the cumulative trapezoidal integral of omega_r
+(method='trapz') or from the unwrapped theta_r difference (method='theta').
+
+SectorStats accumulates count / mean / variance per LUT index across any number
+of runs (Chan's parallel update), so new runs and speed setpoints can be added
+later without reloading the earlier ones. Stats can be saved to / loaded from
+a small .npz file.
+"""
+import numpy as np
+from scipy import stats as sps
+from scipy.integrate import cumulative_trapezoid
+
+from .edges import find_rising_edges
+from .lut_alignment import align_lut
+from .lut_speed import MIN_DT
+from .trace_store import load_channels
+
+
+def interval_ideal_angles(time, edge_indices, omega_r, min_dt=MIN_DT):
+    """
+    Ideal angle (deg) of every edge interval: mean(omega_r[prev:curr+1]) * dt.
+    Returns (seq, angles_deg) where seq is the interval number (for the
+    sector index) of each kept interval.
+    """
+    edge_indices = np.asarray(edge_indices)
+    if len(edge_indices) < 2:
+        return np.array([], dtype=int), np.array([])
+
+    prefix = np.concatenate(([0.0], np.cumsum(omega_r, dtype=float)))
+    idx_prev = edge_indices[:-1]
+    idx_curr = edge_indices[1:]
+
+    dt = np.asarray(time[idx_curr], dtype=float) - np.asarray(time[idx_prev], dtype=float)
+    w_avg = (prefix[idx_curr + 1] - prefix[idx_prev]) / (idx_curr - idx_prev + 1)
+
+    seq = np.flatnonzero(dt >= min_dt)
+    return seq, np.rad2deg(w_avg[seq] * dt[seq])
+
+
+def interval_swept_angles(time, edge_indices, omega_r=None, theta_r=None, min_dt=MIN_DT):
+    """
+    Electrical angle (deg) swept over every edge interval.
+    Uses the unwrapped theta_r difference if theta_r is given, otherwise the
+    cumulative trapezoidal integral of omega_r over time.
+    Returns (seq, angles_deg) like interval_ideal_angles.
+    """
+    edge_indices = np.asarray(edge_indices)
+    if len(edge_indices) < 2:
+        return np.array([], dtype=int), np.array([])
+
+    if theta_r is not None:
+        theta = np.unwrap(np.asarray(theta_r, dtype=float))
+    elif omega_r is not None:
+        theta = cumulative_trapezoid(omega_r, time, initial=0.0)
+    else:
+        raise ValueError("Need omega_r or theta_r to integrate the swept angle")
+
+    idx_prev = edge_indices[:-1]
+    idx_curr = edge_indices[1:]
+    dt = np.asarray(time[idx_curr], dtype=float) - np.asarray(time[idx_prev], dtype=float)
+
+    seq = np.flatnonzero(dt >= min_dt)
+    return seq, np.rad2deg(theta[idx_curr[seq]] - theta[idx_prev[seq]])
+
+
+class SectorStats:
+    def __init__(self, n_sectors=6):
+        self.count = np.zeros(n_sectors)
+        self.mean = np.zeros(n_sectors)
+        self.m2 = np.zeros(n_sectors)
+
+    def add(self, sector, values):
+        """Adds a batch of values, sector[k] being the LUT index of values[k]."""
+        n_sec = len(self.count)
+        sector = np.asarray(sector)
+        values = np.asarray(values, dtype=float)
+
+        n_b = np.bincount(sector, minlength=n_sec).astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_b = np.bincount(sector, weights=values, minlength=n_sec) / n_b
+        mean_b = np.nan_to_num(mean_b)
+        m2_b = np.bincount(sector, weights=(values - mean_b[sector])**2, minlength=n_sec)
+        self._merge(n_b, mean_b, m2_b)
+        return self
+
+    def merge(self, other):
+        """Combines the statistics of another SectorStats into this one."""
+        self._merge(other.count, other.mean, other.m2)
+        return self
+
+    def _merge(self, n_b, mean_b, m2_b):
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frac = np.where(n > 0, n_b / n, 0.0)
+            cross = np.where(n > 0, delta**2 * self.count * n_b / n, 0.0)
+        self.mean = self.mean + delta * frac
+        self.m2 = self.m2 + m2_b + cross
+        self.count = n
+
+    def add_run(self, time, edge_indices, omega_r, shift=0, min_dt=MIN_DT, method='mean', theta_r=None):
+        """
+        Adds every interval of a run; interval k goes to LUT index (k + shift) % 6.
+        method: 'mean' (mean omega_r * dt), 'trapz' (integrated omega_r) or
+        'theta' (unwrapped theta_r difference, theta_r must be given).
+        """
+        if method == 'mean':
+            seq, angles = interval_ideal_angles(time, edge_indices, omega_r, min_dt=min_dt)
+        elif method == 'trapz':
+            seq, angles = interval_swept_angles(time, edge_indices, omega_r=omega_r, min_dt=min_dt)
+        elif method == 'theta':
+            if theta_r is None:
+                raise ValueError("method='theta' needs theta_r")
+            seq, angles = interval_swept_angles(time, edge_indices, theta_r=theta_r, min_dt=min_dt)
+        else:
+            raise ValueError(f"Unknown calibration method '{method}'")
+        return self.add((seq + shift) % len(self.count), angles)
+
+    def lut(self, default=60.0):
+        """Mean ideal angle per sector (default where a sector has no data)."""
+        return np.where(self.count > 0, self.mean, default)
+
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(np.where(self.count > 1, self.m2 / (self.count - 1), np.nan))
+
+    def confidence_interval(self, level=0.95):
+        """(low, high) confidence interval of each sector mean (Student t)."""
+        dof = np.maximum(self.count - 1, 1)
+        t_crit = sps.t.ppf(0.5 + level / 2, dof)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            half = t_crit * self.std() / np.sqrt(self.count)
+        return self.mean - half, self.mean + half
+
+    def save(self, path):
+        np.savez(path, count=self.count, mean=self.mean, m2=self.m2)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            obj = cls(len(f['count']))
+            obj.count, obj.mean, obj.m2 = f['count'], f['mean'], f['m2']
+        return obj
+
+
+def calibrate_runs(mat_paths, ref_lut_deg, stats=None, method='mean'):
+    """
+    Accumulates the ideal LUT over several runs.
+    Each run is aligned to ref_lut_deg first (best shift), so sector k of the
+    result lines up with ref_lut_deg[k] whichever sector the run started in.
+    Returns the (updated) SectorStats.
+    """
+    if stats is None:
+        stats = SectorStats(len(ref_lut_deg))
+    keys = ['time', 'omega_r', 'hardware_ISR'] + (['theta_r'] if method == 'theta' else [])
+    for path in mat_paths:
+        data = load_channels(path, keys)
+        edges = find_rising_edges(data['hardware_ISR'])
+        align = align_lut(data['time'], edges, data['omega_r'], ref_lut_deg, reverse=False)
+        if align is None:
+            print(f"Skipping {path}: not enough edges")
+            continue
+        stats.add_run(data['time'], edges, data['omega_r'], shift=align['shift'],
+                      method=method, theta_r=data.get('theta_r'))
+    return stats
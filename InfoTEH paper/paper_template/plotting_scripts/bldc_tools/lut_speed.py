@@ -0,0 +1,63 @@
+"""
+Vectorized Hall-edge speed estimation with a per-sector angle LUT.
+
+Interval k (between edge k and edge k+1) uses LUT entry (k + shift) % 6, the
+same convention as compute_speed_lut in speed_estimate/estimate_speed.py.
+Intervals shorter than MIN_DT are dropped, but still count towards the sector
+index (as in the original per-edge loop).
+
+The *_from_times variants take edge timestamps directly, e.g. the fractional
+times from edges.rising_edge_times / edges.sector_crossing_times.
+"""
+import numpy as np
+
+MIN_DT = 1e-6
+
+
+def speed_all_shifts_from_times(t_edges, lut_angles_deg, min_dt=MIN_DT):
+    """
+    Speed estimate for every cyclic LUT shift in one pass.
+    Returns (est_time, W) where W[s] is the estimate with shift s,
+    i.e. W has shape (len(lut), N).
+    """
+    lut_rad = np.deg2rad(np.asarray(lut_angles_deg, dtype=float))
+    n_lut = len(lut_rad)
+    t_edges = np.asarray(t_edges, dtype=float)
+    if len(t_edges) < 2:
+        return np.array([]), np.zeros((n_lut, 0))
+
+    dt = np.diff(t_edges)
+    keep = dt >= min_dt
+    seq = np.flatnonzero(keep)
+
+    # Row s is the LUT rolled by -s, gathered at each interval's sequence number
+    lut_idx = (seq[None, :] + np.arange(n_lut)[:, None]) % n_lut
+    W = lut_rad[lut_idx] / dt[keep]
+    return t_edges[1:][keep], W
+
+
+def compute_speed_from_times(t_edges, lut_angles_deg, shift=0, min_dt=MIN_DT):
+    """Speed from edge timestamps using LUT angles with a specific shift."""
+    lut_rad = np.deg2rad(np.asarray(lut_angles_deg, dtype=float))
+    t_edges = np.asarray(t_edges, dtype=float)
+    if len(t_edges) < 2:
+        return np.array([]), np.array([])
+
+    dt = np.diff(t_edges)
+    keep = dt >= min_dt
+    seq = np.flatnonzero(keep)
+
+    w = lut_rad[(seq + shift) % len(lut_rad)] / dt[keep]
+    return t_edges[1:][keep], w
+
+
+def speed_all_shifts(time, edge_indices, lut_angles_deg, min_dt=MIN_DT):
+    """speed_all_shifts_from_times at the sample times of edge_indices."""
+    t_edges = time[np.asarray(edge_indices, dtype=int)]
+    return speed_all_shifts_from_times(t_edges, lut_angles_deg, min_dt=min_dt)
+
+
+def compute_speed_lut(time, edge_indices, lut_angles_deg, shift=0, min_dt=MIN_DT):
+    """Calculates speed using LUT angles with a specific shift."""
+    t_edges = time[np.asarray(edge_indices, dtype=int)]
+    return compute_speed_from_times(t_edges, lut_angles_deg, shift=shift, min_dt=min_dt)
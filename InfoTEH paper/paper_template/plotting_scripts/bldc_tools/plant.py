@@ -0,0 +1,367 @@
+"""
+Python BLDC plant (PM machine + 180 deg six-step inverter), fixed-step.
+
+Motor constants come from setup_motor_params.m (R_s, L_ss, lambda_m, P, J,
+D_m, phi_*_deg, Ts_motor), so a run here uses the same machine as the
+Simulink models. The electrical and mechanical equations are those of the
+Simulink plant, in the rotor qd frame of K_mat.m:
+
+    L di_q/dt = v_q - R_s i_q - omega_r (L i_d + lambda_m)
+    L di_d/dt = v_d - R_s i_d + omega_r L i_q
+    J dw_m/dt = T_e - D_m w_m - T_load,      T_e = 3/2 P/2 lambda_m i_q
+    dtheta_r/dt = omega_r = P/2 w_m
+
+so e_a = omega_r lambda_m cos(theta_r) and e_q = omega_r lambda_m. The phase
+voltages follow inverter_6step_180deg.m from the Hall state of
+hall_sensor.m (with the phi_A/B/C offsets), sampled once per step and held
+over it; the state is advanced with classic RK4.
+
+The state is one array x[..., 4] = (i_q, i_d, omega_r, theta_r).
+simulate_ensemble() steps K runs (Hall offsets, bus voltages, load steps,
+motor constants) together as a (K, 4) array, so the per-step Python
+overhead is paid once for the whole sweep; simulate() is the K = 1 case.
+simulate_events() instead takes adaptive steps between Hall edges, ending
+each sector on the exact transition time (solve_ivp event location).
+simulate() returns the channel names of the recorded runs
+(time, i_a, i_b, i_c, e_a, e_q, omega_r, theta_r, T_e, hardware_ISR), and
+save_run() writes them as a .mat file the plotting scripts can load (there
+is no software_ISR channel, only the Hall-edge hardware_ISR).
+"""
+import ast
+import re
+from pathlib import Path
+
+import numpy as np
+import scipy.io
+from scipy.integrate import solve_ivp
+
+from .hall_emulator import hall_state, transition_angles
+
+PARAMS_FILE = Path(__file__).resolve().parents[4] / 'setup_motor_params.m'
+
+# Default output grid of the fixed-step runs (s); the plant itself steps at dt
+RECORD_DT = 1e-5
+
+# inverter_6step_180deg.m: high-side switches of phases a, b, c per Hall code
+SWITCH_STATES = np.zeros((8, 3))
+SWITCH_STATES[4] = (1, 0, 0)   # State I
+SWITCH_STATES[6] = (1, 1, 0)   # State II
+SWITCH_STATES[2] = (0, 1, 0)   # State III
+SWITCH_STATES[3] = (0, 1, 1)   # State IV
+SWITCH_STATES[1] = (0, 0, 1)   # State V
+SWITCH_STATES[5] = (1, 0, 1)   # State VI
+
+# Phase voltages per unit of V_bus: (1/3) [2 -1 -1; -1 2 -1; -1 -1 2] S
+PHASE_VOLTAGES = SWITCH_STATES @ (np.array([[2, -1, -1], [-1, 2, -1], [-1, -1, 2]]).T / 3.0)
+
+_ASSIGN = re.compile(r'^\s*([A-Za-z]\w*)\s*=\s*(.+?)\s*;?\s*$')
+_ALLOWED = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+            ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+
+def _eval_expr(expr, names):
+    """Value of a scalar MATLAB expression (numbers, names, + - * / ^)."""
+    tree = ast.parse(expr.replace('^', '**'), mode='eval')
+    if not all(isinstance(node, _ALLOWED) for node in ast.walk(tree)):
+        raise ValueError(f"Unsupported expression '{expr}'")
+    return float(eval(compile(tree, '<params>', 'eval'), {'__builtins__': {}}, names))
+
+
+def read_motor_params(path=None):
+    """
+    Scalar assignments of setup_motor_params.m as a dict.
+    Lines that are not plain arithmetic (or use unknown names) are skipped.
+    """
+    path = PARAMS_FILE if path is None else Path(path)
+    params = {}
+    with open(path, 'r') as f:
+        for line in f:
+            m = _ASSIGN.match(line.split('%', 1)[0])
+            if not m:
+                continue
+            try:
+                params[m.group(1)] = _eval_expr(m.group(2), {'pi': np.pi, **params})
+            except (ValueError, SyntaxError, NameError, ZeroDivisionError):
+                continue
+    return params
+
+
+def hall_table(phi_rad):
+    """
+    Sorted transition angles in [0, 2pi) and the Hall code on each interval,
+    so every step looks the code up instead of calling hall_state().
+    phi_rad has shape (..., 3); returns (bounds (..., 6), codes (..., 7)),
+    codes[..., k] holding for bounds[..., k-1] <= theta < bounds[..., k].
+    """
+    phi = np.asarray(phi_rad, dtype=float)
+    bounds = np.sort(np.mod(transition_angles(phi), 2 * np.pi), axis=-1)
+    mid = np.concatenate([bounds[..., :1] / 2,
+                          (bounds[..., :-1] + bounds[..., 1:]) / 2,
+                          (bounds[..., -1:] + 2 * np.pi) / 2], axis=-1)
+    return bounds, hall_state(mid, phi)
+
+
+def hall_codes(theta_r, bounds, codes):
+    """Hall code at theta_r (shape (...)) from a hall_table()."""
+    x = np.mod(theta_r, 2 * np.pi)[..., None]
+    k = np.sum(x >= bounds, axis=-1)
+    codes = np.broadcast_to(codes, k.shape + codes.shape[-1:])
+    return np.take_along_axis(codes, k[..., None], axis=-1)[..., 0]
+
+
+def park(f_a, f_b, f_c, theta):
+    """K_mat.m: stator abc to rotor qd, returns (f_q, f_d)."""
+    a = 2 * np.pi / 3
+    f_q = (2 / 3) * (f_a * np.cos(theta) + f_b * np.cos(theta - a) + f_c * np.cos(theta + a))
+    f_d = (2 / 3) * (f_a * np.sin(theta) + f_b * np.sin(theta - a) + f_c * np.sin(theta + a))
+    return f_q, f_d
+
+
+def inv_park(f_q, f_d, theta):
+    """K_mat_inv.m: rotor qd to stator abc, returns (f_a, f_b, f_c)."""
+    a = 2 * np.pi / 3
+    return (f_q * np.cos(theta) + f_d * np.sin(theta),
+            f_q * np.cos(theta - a) + f_d * np.sin(theta - a),
+            f_q * np.cos(theta + a) + f_d * np.sin(theta + a))
+
+
+def torque(i_q, p):
+    """Electromagnetic torque (N m) of the non-salient machine."""
+    return 1.5 * (p['P'] / 2) * p['lambda_m'] * i_q
+
+
+def derivatives(x, v_q, v_d, t_load, p):
+    """dx/dt for x[..., 4] = (i_q, i_d, omega_r, theta_r)."""
+    i_q, i_d, w_r = x[..., 0], x[..., 1], x[..., 2]
+    pp = p['P'] / 2
+    dx = np.empty_like(x)
+    dx[..., 0] = (v_q - p['R_s'] * i_q - w_r * (p['L_ss'] * i_d + p['lambda_m'])) / p['L_ss']
+    dx[..., 1] = (v_d - p['R_s'] * i_d + w_r * p['L_ss'] * i_q) / p['L_ss']
+    dx[..., 2] = pp * (torque(i_q, p) - p['D_m'] * w_r / pp - t_load) / p['J']
+    dx[..., 3] = w_r
+    return dx
+
+
+def rk4_step(x, dt, v_abc, t_load, p):
+    """
+    One RK4 step with the phase voltages v_abc (..., 3) held over it.
+    The qd voltages follow theta_r inside the step.
+    """
+    def f(y):
+        v_q, v_d = park(v_abc[..., 0], v_abc[..., 1], v_abc[..., 2], y[..., 3])
+        return derivatives(y, v_q, v_d, t_load, p)
+
+    k1 = f(x)
+    k2 = f(x + 0.5 * dt * k1)
+    k3 = f(x + 0.5 * dt * k2)
+    k4 = f(x + dt * k3)
+    return x + (dt / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+def _as_function(value):
+    return value if callable(value) else (lambda t: value)
+
+
+def outputs(x, p):
+    """Recorded channels of states x[..., 4] (not including time / hardware_ISR)."""
+    i_q, i_d, w_r, theta = x[..., 0], x[..., 1], x[..., 2], x[..., 3]
+    i_a, i_b, i_c = inv_park(i_q, i_d, theta)
+    return {
+        'i_a': i_a, 'i_b': i_b, 'i_c': i_c,
+        'e_a': w_r * p['lambda_m'] * np.cos(theta),
+        'e_q': w_r * p['lambda_m'],
+        'omega_r': w_r,
+        'theta_r': np.mod(theta, 2 * np.pi),
+        'T_e': torque(i_q, p),
+    }
+
+
+def step_profile(t_step, before, after):
+    """Vectorized step input: `before` until t_step, `after` from then on (per run)."""
+    before = np.asarray(before, dtype=float)
+    after = np.asarray(after, dtype=float)
+    return lambda t: np.where(t >= t_step, after, before)
+
+
+def simulate_ensemble(t_end, phi_deg=None, v_bus=36.0, t_load=0.0, params=None, dt=None,
+                      record_every=None, x0=None):
+    """
+    K runs stepped in lockstep as one (K, 4) state array.
+    phi_deg has shape (K, 3) (or (3,) for all runs); v_bus and t_load are
+    scalars, (K,) arrays or functions of time returning them (step_profile).
+    Entries of params may also be (K,) arrays (e.g. a J or R_s sweep).
+    K is the broadcast length of all of these.
+    Every record_every-th step is kept, by default round(RECORD_DT / dt), so
+    the output grid is 10 us whatever the step. The result holds about
+    120 bytes per run and recorded sample (state, Hall code and the derived
+    channels): 100 runs of 1.5 s on the 10 us grid are ~1.8 GB, and
+    record_every=1 at Ts_motor = 1 us is ten times that.
+    Returns a dict with 'time' (n,) and every channel as a (K, n) array.
+    """
+    p = read_motor_params() if params is None else params
+    if phi_deg is None:
+        phi_deg = [p.get(f'phi_{k}_deg', 0.0) for k in 'ABC']
+    dt = p.get('Ts_motor', 1e-6) if dt is None else dt
+    if record_every is None:
+        record_every = max(1, int(round(RECORD_DT / dt)))
+    v_bus, t_load = _as_function(v_bus), _as_function(t_load)
+
+    phi = np.deg2rad(np.atleast_2d(np.asarray(phi_deg, dtype=float)))
+    x0 = np.zeros(4) if x0 is None else np.asarray(x0, dtype=float)
+    shapes = [phi.shape[:-1], x0.shape[:-1], np.shape(v_bus(0.0)), np.shape(t_load(0.0))]
+    shapes += [np.shape(v) for v in p.values()]
+    n_runs = int(np.prod(np.broadcast_shapes(*shapes)))
+
+    bounds, codes = hall_table(np.broadcast_to(phi, (n_runs, 3)))
+    n_steps = int(round(t_end / dt))
+    n_out = n_steps // record_every + 1
+
+    # Recorded run-major, so the channels come out as (K, n) without a transpose
+    x = np.array(np.broadcast_to(x0, (n_runs, 4)))
+    rec_x = np.empty((n_runs, n_out, 4))
+    rec_hall = np.empty((n_runs, n_out), dtype=np.int64)
+    rec_x[:, 0] = x
+    rec_hall[:, 0] = hall_codes(x[:, 3], bounds, codes)
+
+    for n in range(n_steps):
+        t = n * dt
+        code = hall_codes(x[:, 3], bounds, codes)
+        v_abc = np.asarray(v_bus(t), dtype=float)[..., None] * PHASE_VOLTAGES[code]
+        x = rk4_step(x, dt, v_abc, t_load(t), p)
+        if (n + 1) % record_every == 0:
+            k = (n + 1) // record_every
+            rec_x[:, k] = x
+            rec_hall[:, k] = hall_codes(x[:, 3], bounds, codes)
+
+    runs = {'time': np.arange(n_out) * dt * record_every}
+    runs.update({k: np.ascontiguousarray(np.broadcast_to(v, (n_runs, n_out)))
+                 for k, v in outputs(rec_x, p).items()})
+    del rec_x
+    runs['hall_state'] = rec_hall
+    hw = np.zeros((n_runs, n_out), dtype=np.uint8)
+    hw[:, 1:] = rec_hall[:, 1:] != rec_hall[:, :-1]
+    runs['hardware_ISR'] = hw
+    return runs
+
+
+def split_runs(runs):
+    """Per-run dicts (1-D channels, shared time) from a simulate_ensemble result."""
+    n_runs = len(runs['hall_state'])
+    return [{k: v if k == 'time' else v[j] for k, v in runs.items()} for j in range(n_runs)]
+
+
+def simulate(t_end, v_bus=36.0, t_load=0.0, params=None, phi_deg=None, dt=None,
+             record_every=None, x0=None):
+    """
+    Fixed-step run of the plant driven by the 180 deg six-step inverter.
+    v_bus and t_load are constants or functions of time (e.g. a voltage step).
+    params defaults to read_motor_params(); phi_deg to its phi_A/B/C_deg;
+    dt to Ts_motor. Every record_every-th step is kept (default: a 10 us
+    grid, see simulate_ensemble).
+    Returns a dict of 1-D arrays with the recorded channel names, plus
+    hall_state.
+    """
+    runs = simulate_ensemble(t_end, phi_deg=phi_deg, v_bus=v_bus, t_load=t_load, params=params,
+                             dt=dt, record_every=record_every, x0=x0)
+    return split_runs(runs)[0]
+
+
+def _edge_events(theta_next, theta_prev):
+    def forward(t, x):
+        return x[3] - theta_next
+    forward.terminal, forward.direction = True, 1
+
+    def reverse(t, x):
+        return x[3] - theta_prev
+    reverse.terminal, reverse.direction = True, -1
+    return [forward, reverse]
+
+
+def simulate_events(t_end, v_bus=36.0, t_load=0.0, params=None, phi_deg=None, dt_out=None,
+                    breaks=(), method='RK45', rtol=1e-6, atol=1e-9, x0=None):
+    """
+    Event-driven run: adaptive solve_ivp between Hall edges.
+    The inverter state only changes at a Hall transition, so each sector is
+    one smooth ODE solve that ends on the next (or, turning backwards, the
+    previous) transition angle of the offset sensors, located by the solver's
+    root finding. Outputs are the dense solution on a uniform dt_out grid
+    (default Ts_motor). v_bus and t_load may be functions of time; list the
+    times where they jump in `breaks` so no step straddles a jump.
+    Returns (run, info): run has the channels of simulate(), info the
+    solver steps, rhs evaluations and the exact edge times / entered codes.
+    """
+    p = read_motor_params() if params is None else params
+    if phi_deg is None:
+        phi_deg = [p.get(f'phi_{k}_deg', 0.0) for k in 'ABC']
+    dt_out = p.get('Ts_motor', 1e-6) if dt_out is None else dt_out
+    v_bus, t_load = _as_function(v_bus), _as_function(t_load)
+
+    bounds, codes = hall_table(np.deg2rad(np.asarray(phi_deg, dtype=float)))
+    # Sector k (0..6, 0 and 6 being the same sector) of revolution rev spans
+    # [ext[k], ext[k + 1]) + 2 pi rev on the unwrapped angle
+    ext = np.concatenate(([bounds[-1] - 2 * np.pi], bounds, [bounds[0] + 2 * np.pi]))
+
+    time = np.arange(int(round(t_end / dt_out)) + 1) * dt_out
+    rec_x = np.empty((len(time), 4))
+    rec_hall = np.empty(len(time), dtype=np.int64)
+
+    x = np.zeros(4) if x0 is None else np.array(x0, dtype=float)
+    rev = np.floor(x[3] / (2 * np.pi))
+    k = int(np.searchsorted(bounds, x[3] - 2 * np.pi * rev, side='right'))
+    stops = sorted({float(b) for b in breaks if 0 < b < time[-1]} | {float(time[-1])})
+
+    t, i_out = 0.0, 0
+    info = {'steps': 0, 'nfev': 0, 'edge_times': [], 'edge_state': []}
+    while t < time[-1]:
+        code = codes[k]
+        v_abc = PHASE_VOLTAGES[code]
+
+        def rhs(tt, y):
+            v_q, v_d = park(*(v_bus(tt) * v_abc), y[3])
+            return derivatives(y, v_q, v_d, t_load(tt), p)
+
+        base = 2 * np.pi * rev
+        t_stop = next(b for b in stops if b > t)
+        sol = solve_ivp(rhs, (t, t_stop), x, method=method, rtol=rtol, atol=atol,
+                        events=_edge_events(base + ext[k + 1], base + ext[k]), dense_output=True)
+        info['steps'] += len(sol.sol.ts) - 1
+        info['nfev'] += sol.nfev
+
+        # Grid samples before the end of the segment (all of them at the end
+        # of the run) come from this sector's dense solution
+        t, x = sol.t[-1], sol.y[:, -1].copy()
+        j = len(time) if sol.status == 0 and t >= time[-1] else np.searchsorted(time, t)
+        rec_x[i_out:j] = sol.sol(time[i_out:j]).T
+        rec_hall[i_out:j] = code
+        i_out = j
+
+        if sol.status == 1:
+            k += 1 if len(sol.t_events[0]) else -1
+            if k > 6:
+                k, rev = 1, rev + 1
+            elif k < 0:
+                k, rev = 5, rev - 1
+            info['edge_times'].append(t)
+            info['edge_state'].append(codes[k])
+
+    # A run that ends exactly on an edge leaves the last sample to the new sector
+    rec_x[i_out:] = x
+    rec_hall[i_out:] = codes[k]
+
+    run = {'time': time}
+    run.update(outputs(rec_x, p))
+    run['hall_state'] = rec_hall
+    run['hardware_ISR'] = np.concatenate(([0], rec_hall[1:] != rec_hall[:-1])).astype(np.uint8)
+    info['edge_times'] = np.array(info['edge_times'])
+    info['edge_state'] = np.array(info['edge_state'], dtype=np.int64)
+    return run, info
+
+
+def save_run(path, run):
+    """
+    Writes a run as column vectors, like the To Workspace blocks of the models.
+    The plant has no speed controller, so there is no software_ISR channel:
+    scripts that need one (speed_estimate/estimate_speed.py,
+    test_mixed_timing.py) cannot read these runs.
+    """
+    scipy.io.savemat(path, {k: np.asarray(v).reshape(-1, 1) for k, v in run.items()})
@@ -0,0 +1,113 @@
+"""
+Level-of-detail plotting for the 1.5M-sample traces.
+
+matplotlib draws every vertex it is given, although only a couple of thousand
+pixel columns end up in the PNG. lod_plot / lod_step cut the trace to the
+visible x-window and keep, for each pixel column, the first/last sample and
+the min and max of y (in time order). The polyline then covers exactly the
+same pixels as the full-resolution one, peaks and spikes included.
+
+The full data is kept on the line, and it is re-decimated whenever the x-limits
+change (zoom / pan in plt.show(), or a later set_xlim()).
+"""
+import numpy as np
+import matplotlib as mpl
+
+# Points per pixel column are (first, min, max, last), so this many columns
+# per pixel is enough to be exact; 2 leaves headroom for antialiasing.
+OVERSAMPLE = 2
+
+
+def minmax_decimate(x, y, n_bins, xlim=None):
+    """
+    Min/max-preserving decimation of (x, y), x sorted.
+    Only the samples inside xlim (plus one on each side, so the line runs off
+    the edge of the axes) are kept. Returns (x, y) with at most ~4 * n_bins
+    points, unchanged if the window is already that small.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = min(len(x), len(y))
+    lo, hi = 0, n
+    if xlim is not None:
+        lo = max(int(np.searchsorted(x[:n], min(xlim), side='left')) - 1, 0)
+        hi = min(int(np.searchsorted(x[:n], max(xlim), side='right')) + 1, n)
+    x = x[lo:hi]
+    y = y[lo:hi]
+    n = hi - lo
+
+    n_bins = max(int(n_bins), 1)
+    if n <= 4 * n_bins:
+        return np.array(x), np.array(y)
+
+    # Equal-count bins (the traces are on a fixed 1 us grid); the remainder
+    # goes to one extra, shorter bin
+    m = n // n_bins
+    body = m * n_bins
+    starts = np.arange(n_bins) * m
+    yb = y[:body].reshape(n_bins, m)
+    keep = [starts, starts + m - 1, starts + np.argmin(yb, axis=1), starts + np.argmax(yb, axis=1)]
+    if body < n:
+        tail = y[body:]
+        keep.append(np.array([body, n - 1, body + np.argmin(tail), body + np.argmax(tail)]))
+
+    idx = np.unique(np.concatenate(keep))
+    return x[idx], y[idx]
+
+
+def step_vertices(x, y):
+    """Vertices of a where='post' step plot, so it can be decimated as a line."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) < 2:
+        return x, y
+    return np.repeat(x, 2)[1:], np.repeat(y, 2)[:-1]
+
+
+def _pixel_width(ax, dpi=None):
+    """Width of the axes in output pixels (at the savefig dpi if none is given)."""
+    fig = ax.figure
+    if dpi is None:
+        dpi = mpl.rcParams['savefig.dpi']
+        if not isinstance(dpi, (int, float)):
+            dpi = fig.dpi
+        dpi = max(dpi, fig.dpi)
+    return ax.get_position().width * fig.get_figwidth() * dpi
+
+
+def _visible_xlim(ax, xlim):
+    if xlim is not None:
+        return xlim
+    # While x autoscaling is on the final limits are not known yet: use the whole trace
+    if ax.get_autoscalex_on():
+        return None
+    return ax.get_xlim()
+
+
+def lod_plot(ax, x, y, *args, xlim=None, dpi=None, **kwargs):
+    """
+    ax.plot(x, y, *args, **kwargs) with min/max decimation to the axes width.
+    xlim is the x-window that will be shown (defaults to the current limits if
+    x autoscaling is off, else the whole trace). dpi is the dpi the figure will
+    be saved at. Returns the Line2D.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n_bins = OVERSAMPLE * _pixel_width(ax, dpi)
+
+    xd, yd = minmax_decimate(x, y, n_bins, _visible_xlim(ax, xlim))
+    line, = ax.plot(xd, yd, *args, **kwargs)
+
+    def _on_xlim(ax_):
+        line.set_data(*minmax_decimate(x, y, OVERSAMPLE * _pixel_width(ax_, dpi), ax_.get_xlim()))
+
+    ax.callbacks.connect('xlim_changed', _on_xlim)
+    return line
+
+
+def lod_step(ax, x, y, *args, xlim=None, dpi=None, where='post', **kwargs):
+    """ax.step(..., where='post') drawn through lod_plot. Returns the Line2D."""
+    if where != 'post':
+        raise ValueError("lod_step only supports where='post'")
+    xs, ys = step_vertices(x, y)
+    return lod_plot(ax, xs, ys, *args, xlim=xlim, dpi=dpi, **kwargs)
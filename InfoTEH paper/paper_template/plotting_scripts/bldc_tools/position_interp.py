@@ -0,0 +1,143 @@
+"""
+Rotor-position interpolation between Hall edges.
+
+Between edge k and edge k+1 the electrical angle is extrapolated from the
+angle of the boundary just crossed and the speed estimate at that edge:
+
+    theta_hat(t) = theta_k + w_k * (t - t_k),    t_k <= t < t_(k+1)
+
+theta_k comes from the sector start angles: the true Hall transition
+angles of the sensor offsets (hall_start_angles()), or ideal 60 deg / LUT
+sector widths anchored at the start of sector 1. Every sample finds its
+edge with one searchsorted over the edge times, so the whole run is
+evaluated at once. With clamp=True the advance stops at the width of the
+current sector (the estimate never runs past the next, not yet seen, edge).
+
+The direction of rotation at each edge follows from the sector sequence:
+a sector entered from the one after it was entered backwards, at its end
+angle, and the angle is extrapolated downwards from there.
+
+position_error() and error_stats() compare theta_hat with theta_r,
+wrapped to (-180, 180] deg, overall and per sector.
+"""
+import numpy as np
+
+from .edges import sector_boundaries
+from .hall_emulator import HALL_TO_SECTOR, hall_state, transition_angles
+
+# SpeedEstimator reads LUT entry (sector - 1 + 2) % 6 for an interval in `sector`
+LUT_SHIFT = 2
+
+
+def hall_start_angles(phi_deg=(0.0, 0.0, 0.0)):
+    """
+    Start angle (rad, in [0, 2pi)) of sectors 1..6 (index 0..5) for Hall
+    sensors with offsets phi_deg, i.e. the transition angle at which each
+    sector is entered in forward rotation (hall_sensor.m convention).
+    With phi_deg = 0 sector 1 (State I) starts at -30 deg; the +30 deg
+    offsets of estimate_speed.py move it to 0.
+    """
+    phi = np.deg2rad(np.asarray(phi_deg, dtype=float))
+    bounds = transition_angles(phi)
+    entered = HALL_TO_SECTOR[hall_state(bounds + 1e-9, phi)]
+    starts = np.empty(6)
+    starts[entered - 1] = np.mod(bounds, 2 * np.pi)
+    return starts
+
+
+def sector_start_angles(lut_vals_deg=None, phi_deg=None, offset_deg=None, lut_shift=LUT_SHIFT):
+    """
+    Start angle (rad) of sectors 1..6 (index 0..5). Without a LUT every
+    sector is 60 deg wide; with one, sector s is lut[(s - 1 + lut_shift) % 6] wide.
+    Sector 1 starts at offset_deg if given, else at its Hall transition
+    angle for the sensor offsets phi_deg (hall_start_angles()), else at
+    theta_r = 0 (the +30 deg emulator offsets of estimate_speed.py). Runs of
+    hall_sensor.m / plant.py need phi_deg: their sector 1 starts near -30 deg.
+    """
+    if lut_vals_deg is None and offset_deg is None and phi_deg is not None:
+        return hall_start_angles(phi_deg)
+    if offset_deg is None:
+        offset_deg = 0.0 if phi_deg is None else np.rad2deg(hall_start_angles(phi_deg)[0])
+    if lut_vals_deg is None:
+        widths = np.full(6, 60.0)
+    else:
+        widths = np.roll(np.asarray(lut_vals_deg, dtype=float), -lut_shift)
+    return sector_boundaries(widths, offset_deg)
+
+
+def edge_direction(edge_sector):
+    """
+    +1 / -1 per edge for forward / reverse rotation, from the sector
+    sequence (the first edge is taken as forward).
+    """
+    sector = np.asarray(edge_sector, dtype=np.int64)
+    direction = np.ones(len(sector), dtype=np.int64)
+    direction[1:][np.mod(sector[1:] - sector[:-1], 6) == 5] = -1
+    return direction
+
+
+def interpolate_position(time, t_edges, edge_sector, w_edges, starts_rad, clamp=False):
+    """
+    theta_hat (rad, wrapped to [0, 2pi)) on the sample grid.
+    t_edges: edge times (sorted); edge_sector: sector 1..6 entered at each
+    edge; w_edges: speed estimate (electrical rad/s) valid from each edge on,
+    its magnitude taken with the direction of edge_direction().
+    starts_rad: sector start angles (sector_start_angles()). A sector
+    entered forwards starts at its start angle, one entered backwards at
+    the start angle of the next sector.
+    Samples before the first edge are NaN.
+    """
+    time = np.asarray(time, dtype=float)
+    t_edges = np.asarray(t_edges, dtype=float)
+    sector = np.asarray(edge_sector, dtype=np.int64)
+    w_edges = np.asarray(w_edges, dtype=float)
+    starts = np.asarray(starts_rad, dtype=float)
+
+    k = np.searchsorted(t_edges, time, side='right') - 1
+    valid = k >= 0
+    kv = k[valid]
+    direction = edge_direction(sector)[kv]
+    s = sector[kv] - 1
+
+    advance = direction * np.abs(w_edges[kv]) * (time[valid] - t_edges[kv])
+    if clamp:
+        widths = np.mod(np.roll(starts, -1) - starts, 2 * np.pi)
+        advance = np.clip(advance, -widths[s], widths[s])
+
+    entry = np.where(direction > 0, starts[s], starts[np.mod(s + 1, 6)])
+    theta_hat = np.full(len(time), np.nan)
+    theta_hat[valid] = np.mod(entry + advance, 2 * np.pi)
+    return theta_hat
+
+
+def position_error(theta_hat, theta_r):
+    """theta_hat - theta_r (deg), wrapped to (-180, 180]."""
+    d = np.asarray(theta_hat, dtype=float) - np.asarray(theta_r, dtype=float)
+    return -np.rad2deg(np.angle(np.exp(-1j * d)))
+
+
+def error_stats(err_deg, sector=None):
+    """
+    mean, rms, max_abs and p95_abs of an angle error (deg), ignoring NaN.
+    If sector (1..6 per sample) is given, also 'sector_mean' / 'sector_rms'
+    arrays of length 6 (NaN for sectors never seen).
+    """
+    err = np.asarray(err_deg, dtype=float)
+    ok = ~np.isnan(err)
+    e = err[ok]
+    if len(e) == 0:
+        stats = {'mean': np.nan, 'rms': np.nan, 'max_abs': np.nan, 'p95_abs': np.nan}
+    else:
+        stats = {'mean': float(np.mean(e)), 'rms': float(np.sqrt(np.mean(e**2))),
+                 'max_abs': float(np.max(np.abs(e))), 'p95_abs': float(np.percentile(np.abs(e), 95))}
+
+    if sector is not None:
+        s = np.asarray(sector, dtype=np.int64)[ok] - 1
+        inside = (s >= 0) & (s < 6)
+        count = np.bincount(s[inside], minlength=6)
+        total = np.bincount(s[inside], weights=e[inside], minlength=6)
+        total_sq = np.bincount(s[inside], weights=e[inside]**2, minlength=6)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats['sector_mean'] = total / count
+            stats['sector_rms'] = np.sqrt(total_sq / count)
+    return stats
@@ -0,0 +1,162 @@
+"""
+3-step / 6-step Hall averaging and LUT-corrected speed estimators.
+
+All three estimate omega_r at every accepted Hall edge k as the electrical
+angle swept over the last n sector intervals divided by their duration:
+
+    w_k = (A_k - A_(k-n)) / (t_k - t_(k-n)),    A_k = sum of interval angles
+
+with every interval worth pi/3 for the averaging filters (n = 3 or 6), or
+its LUT angle for the LUT correction (n = 1, the w_lut of SpeedEstimator).
+A and t are prefix sums over the edge arrays, so any window length costs
+one subtraction per edge. The first edges after start-up use the intervals
+available so far; there estimate() and process() differ (see estimate()).
+
+SectorAverageEstimator has the interface of the firmware model:
+update(timer, hw_trig, sw_trig, hall_state) per sample, process() on
+chunks and run_chunked() on whole runs, plus estimate() directly on
+edge-time arrays (e.g. hall_emulator edge_times). make_estimators() builds
+the three strategies of the paper under the keys of the figure STYLES.
+"""
+import numpy as np
+
+from .crossings import debounce
+from .speed_estimator import MIN_DT, _accept_events, _as_int, _hold
+
+SECTOR_RAD = np.pi / 3
+
+
+def _interval_angles(prev_hall, lut_rad):
+    """Angle of each interval, from the Hall state latched at its start."""
+    if lut_rad is None:
+        return np.full(len(prev_hall), SECTOR_RAD)
+    return lut_rad[(np.asarray(prev_hall, dtype=np.int64) - 1 + 2) % 6]
+
+
+def _window_speed(t, A, first, n_steps):
+    """w at positions first.. of the edge / cumulative-angle arrays t, A."""
+    p = np.arange(first, len(t))
+    back = p - np.minimum(n_steps, p)
+    return (A[p] - A[back]) / (t[p] - t[back])
+
+
+class SectorAverageEstimator:
+    def __init__(self, n_steps=1, lut_vals_deg=None):
+        self.n_steps = int(n_steps)
+        self.lut_vals_rad = None if lut_vals_deg is None else np.deg2rad(np.asarray(lut_vals_deg, dtype=float))
+        self.reset()
+
+    def reset(self):
+        # Last n_steps + 1 accepted edge times and cumulative angles
+        self.t_hist = np.array([])
+        self.A_hist = np.array([])
+        self.w_store = 0.0
+        self.prev_hall_state = 1
+        self.prev_hw_trig = 0
+
+    def estimate(self, t_edges, hall_state=None, t_start=None):
+        """
+        Speed at every edge of a whole trace (stateless).
+        hall_state[k] is the state entered at edge k (needed with a LUT).
+        Edges closer than MIN_DT to the previous kept one are dropped.
+        Without t_start the first edge only starts the timer, so the result
+        begins at edge 1 and each window holds whole sector intervals. The
+        firmware model (process()) instead latches the timer at the first
+        sample, so its first n estimates include the partial interval from
+        there to the first edge (and, with a LUT, the angle of Hall state 1)
+        and differ from these. Pass t_start = time[0] to seed estimate() the
+        same way; it then returns the process() values at every kept edge.
+        Returns (est_time, w).
+        """
+        t_edges = np.asarray(t_edges, dtype=float)
+        if t_start is None:
+            keep = debounce(t_edges, MIN_DT)
+            t = t_edges[keep]
+            prev_state = ()
+        else:
+            keep = debounce(t_edges, MIN_DT, t_prev=float(t_start))
+            t = np.concatenate(([float(t_start)], t_edges[keep]))
+            prev_state = (1,)
+        if len(t) < 2:
+            return np.array([]), np.array([])
+        if self.lut_vals_rad is None:
+            prev_hall = np.zeros(len(t) - 1)
+        else:
+            prev_hall = np.concatenate((prev_state, np.asarray(hall_state)[keep]))[:len(t) - 1]
+        A = np.concatenate(([0.0], np.cumsum(_interval_angles(prev_hall, self.lut_vals_rad))))
+        return t[1:], _window_speed(t, A, 1, self.n_steps)
+
+    def process(self, time, hw_trig, sw_trig, hall_state):
+        """
+        Runs the estimator over a chunk of samples (sw_trig is unused; it is
+        kept so the call matches StreamingSpeedEstimator.process()).
+        Returns w held on the sample grid.
+        """
+        n = len(time)
+        if n == 0:
+            return np.array([])
+
+        hw = _as_int(hw_trig)
+        hall = _as_int(hall_state)
+        trig = (hw > 0) & (np.concatenate(([self.prev_hw_trig], hw[:-1])) == 0)
+        self.prev_hw_trig = int(hw[-1])
+
+        if len(self.t_hist) == 0:
+            # Very first sample only latches the timer, like SpeedEstimator
+            self.t_hist = np.array([float(time[0])])
+            self.A_hist = np.array([0.0])
+            trig[0] = False
+
+        init = self.w_store
+        idx, t_ev = _accept_events(time, np.flatnonzero(trig), self.t_hist[-1])
+        if len(idx) == 0:
+            return np.full(n, init)
+
+        hall_ev = hall[idx]
+        prev_hall = np.concatenate(([self.prev_hall_state], hall_ev[:-1]))
+        angles = _interval_angles(prev_hall, self.lut_vals_rad)
+
+        t_all = np.concatenate((self.t_hist, t_ev))
+        A_all = np.concatenate((self.A_hist, self.A_hist[-1] + np.cumsum(angles)))
+        w_ev = _window_speed(t_all, A_all, len(self.t_hist), self.n_steps)
+
+        keep = min(self.n_steps + 1, len(t_all))
+        self.t_hist = t_all[-keep:]
+        self.A_hist = A_all[-keep:] - A_all[-keep]
+        self.prev_hall_state = int(hall_ev[-1])
+        self.w_store = float(w_ev[-1])
+        return _hold(n, idx, w_ev, init)
+
+    def update(self, timer, hw_trig, sw_trig, hall_state):
+        """Per-sample call, as SpeedEstimator.update(); returns the held estimate."""
+        return float(self.process(np.array([timer], dtype=float), [hw_trig], [sw_trig], [hall_state])[0])
+
+    def run_chunked(self, time, hw_trig, sw_trig, hall_state, chunk_size=250_000):
+        """Feeds full-length (possibly memory-mapped) arrays through process() chunk by chunk."""
+        out = [self.process(time[s:s + chunk_size], hw_trig[s:s + chunk_size],
+                            sw_trig[s:s + chunk_size], hall_state[s:s + chunk_size])
+               for s in range(0, len(time), chunk_size)]
+        return np.concatenate(out) if out else np.array([])
+
+
+def make_estimators(lut_vals_deg):
+    """The three strategies compared in the paper, keyed like the figure STYLES."""
+    return {
+        'LUT': SectorAverageEstimator(1, lut_vals_deg),
+        '3_step': SectorAverageEstimator(3),
+        '6_step': SectorAverageEstimator(6),
+    }
+
+
+def run_estimators(estimators, time, hw_trig, sw_trig, hall_state, chunk_size=250_000):
+    """
+    Runs several estimators over the same recorded trace, sharing each chunk.
+    Returns {name: w on the sample grid}.
+    """
+    out = {name: [] for name in estimators}
+    for s in range(0, len(time), chunk_size):
+        sl = slice(s, s + chunk_size)
+        t, hw, sw, hall = time[sl], hw_trig[sl], sw_trig[sl], hall_state[sl]
+        for name, est in estimators.items():
+            out[name].append(est.process(t, hw, sw, hall))
+    return {name: np.concatenate(w) if w else np.array([]) for name, w in out.items()}
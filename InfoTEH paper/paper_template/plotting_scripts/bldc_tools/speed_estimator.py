@@ -0,0 +1,211 @@
+"""
+Python model of the firmware speed estimator (HW ISR, filtered HW, SW ISR, LUT).
+
+SpeedEstimator is the per-sample reference (one update() call per sample).
+StreamingSpeedEstimator produces the same outputs (up to float rounding in
+the filtered estimate) from whole chunks of samples: edge detection is
+vectorized, the ISR maths is evaluated over all trigger events at once (the
+dt_filt_store filter through filters.exp_filter), and the held outputs are
+expanded back onto the sample grid.
+State carries over between process() calls, so a run can be fed in pieces.
+"""
+import numpy as np
+
+from .filters import exp_filter
+
+MIN_DT = 1e-6
+
+
+class SpeedEstimator:
+    def __init__(self, lut_vals_deg):
+        self.t_prev_hw = None
+        self.t_prev_sw = None
+        # Initialize stores
+        self.w_hw_store = 0.0
+        self.w_hw_filt_store = 0.0
+        self.w_sw_store = 0.0
+        self.w_lut_store = 0.0
+        self.dt_filt_store = 0.0
+
+        self.prev_hall_state = 1
+        self.prev_hw_trig = 0
+        self.prev_sw_trig = 0
+
+        self.PI_over_3 = np.pi / 3.0
+        self.ALPHA = 0.05
+
+        self.lut_vals_rad = np.deg2rad(lut_vals_deg)
+
+    def update(self, timer, hw_trig, sw_trig, hall_state):
+        # Convert inputs to simple types
+        hw_trig = int(hw_trig)
+        sw_trig = int(sw_trig)
+        hall_state = int(hall_state)
+
+        # Edge Detection
+        trig_hw_now = (hw_trig > 0) and (self.prev_hw_trig == 0)
+        trig_sw_now = (sw_trig > 0) and (self.prev_sw_trig == 0)
+
+        self.prev_hw_trig = hw_trig
+        self.prev_sw_trig = sw_trig
+
+        if self.t_prev_hw is None:
+            self.t_prev_hw = float(timer)
+            self.t_prev_sw = float(timer)
+            return 0, 0, 0, 0
+
+        # --- HARDWARE ISR ---
+        if trig_hw_now:
+            self._on_hw_edge(float(timer), hall_state)
+
+        # --- SOFTWARE ISR ---
+        if trig_sw_now:
+            self._on_sw_edge(float(timer))
+
+        return self.w_hw_store, self.w_hw_filt_store, self.w_sw_store, self.w_lut_store
+
+    def _on_hw_edge(self, timer, hall_state):
+        dt_hw = timer - self.t_prev_hw
+        if dt_hw <= MIN_DT:
+            return False
+
+        # 1. Raw HW
+        self.w_hw_store = self.PI_over_3 / dt_hw
+
+        # 2. Filtered
+        if self.dt_filt_store == 0:
+            self.dt_filt_store = dt_hw
+        else:
+            self.dt_filt_store = (self.ALPHA * dt_hw) + ((1 - self.ALPHA) * self.dt_filt_store)
+
+        self.w_hw_filt_store = self.PI_over_3 / self.dt_filt_store
+
+        # 3. LUT Based
+        # User Logic: idx = mod((prev_hall_state) + 2, 6)
+        # prev_hall_state 1..6 -> 0..5. +2 -> shift. %6 -> wrap.
+        idx = (self.prev_hall_state - 1 + 2) % 6
+        actual_angle = self.lut_vals_rad[idx]
+
+        self.w_lut_store = actual_angle / dt_hw
+
+        self.t_prev_hw = timer
+        self.prev_hall_state = hall_state
+        return True
+
+    def _on_sw_edge(self, timer):
+        dt_sw = timer - self.t_prev_sw
+        if dt_sw <= MIN_DT:
+            return False
+        self.w_sw_store = self.PI_over_3 / dt_sw
+        self.t_prev_sw = timer
+        return True
+
+
+def _as_int(x):
+    """Vectorized int() (truncation towards zero), as done in update()."""
+    return np.trunc(np.asarray(x, dtype=float)).astype(np.int64)
+
+
+def _accept_events(time, ev, t_prev):
+    """
+    Drops trigger events closer than MIN_DT to the previously accepted one
+    (the ISR ignores them and keeps its old timestamp).
+    Returns (accepted indices, their times).
+    """
+    t_ev = np.asarray(time[ev], dtype=float)
+    if len(ev) == 0 or np.all(np.diff(np.concatenate(([t_prev], t_ev))) > MIN_DT):
+        return ev, t_ev
+    keep = np.zeros(len(ev), dtype=bool)
+    for k, t in enumerate(t_ev):
+        if t - t_prev > MIN_DT:
+            keep[k] = True
+            t_prev = t
+    return ev[keep], t_ev[keep]
+
+
+def _hold(n, idx, vals, initial):
+    """Zero-order hold: sample i takes the value of the last event at or before i."""
+    pos = np.searchsorted(idx, np.arange(n), side='right')
+    return np.concatenate(([initial], vals))[pos]
+
+
+class StreamingSpeedEstimator(SpeedEstimator):
+    def process(self, time, hw_trig, sw_trig, hall_state):
+        """
+        Runs update() semantics over a chunk of samples.
+        Returns (w_hw, w_hw_filt, w_sw, w_lut) arrays, one value per sample.
+        """
+        n = len(time)
+        if n == 0:
+            empty = np.array([])
+            return empty, empty, empty, empty
+
+        hw = _as_int(hw_trig)
+        sw = _as_int(sw_trig)
+        hall = _as_int(hall_state)
+
+        # Edge detection, with the previous chunk's last sample as history
+        trig_hw = (hw > 0) & (np.concatenate(([self.prev_hw_trig], hw[:-1])) == 0)
+        trig_sw = (sw > 0) & (np.concatenate(([self.prev_sw_trig], sw[:-1])) == 0)
+        self.prev_hw_trig = int(hw[-1])
+        self.prev_sw_trig = int(sw[-1])
+
+        if self.t_prev_hw is None:
+            # Very first sample only latches the timers
+            self.t_prev_hw = float(time[0])
+            self.t_prev_sw = float(time[0])
+            trig_hw[0] = False
+            trig_sw[0] = False
+
+        # Stores held from before this chunk
+        init_hw = (self.w_hw_store, self.w_hw_filt_store, self.w_lut_store)
+        init_sw = self.w_sw_store
+
+        # --- HARDWARE ISR ---
+        hw_idx, t_hw = _accept_events(time, np.flatnonzero(trig_hw), self.t_prev_hw)
+        if len(hw_idx):
+            dt_hw = np.diff(np.concatenate(([self.t_prev_hw], t_hw)))
+            w_hw_ev = self.PI_over_3 / dt_hw
+
+            y_prev = None if self.dt_filt_store == 0 else self.dt_filt_store
+            dt_filt = exp_filter(dt_hw, self.ALPHA, y_prev=y_prev)
+            w_filt_ev = self.PI_over_3 / dt_filt
+
+            # LUT index comes from the hall state latched at the previous accepted edge
+            hall_ev = hall[hw_idx]
+            prev_hall = np.concatenate(([self.prev_hall_state], hall_ev[:-1]))
+            w_lut_ev = self.lut_vals_rad[(prev_hall - 1 + 2) % 6] / dt_hw
+
+            self.t_prev_hw = float(t_hw[-1])
+            self.dt_filt_store = float(dt_filt[-1])
+            self.prev_hall_state = int(hall_ev[-1])
+            self.w_hw_store = float(w_hw_ev[-1])
+            self.w_hw_filt_store = float(w_filt_ev[-1])
+            self.w_lut_store = float(w_lut_ev[-1])
+        else:
+            w_hw_ev = w_filt_ev = w_lut_ev = np.array([])
+
+        # --- SOFTWARE ISR ---
+        sw_idx, t_sw = _accept_events(time, np.flatnonzero(trig_sw), self.t_prev_sw)
+        if len(sw_idx):
+            w_sw_ev = self.PI_over_3 / np.diff(np.concatenate(([self.t_prev_sw], t_sw)))
+            self.t_prev_sw = float(t_sw[-1])
+            self.w_sw_store = float(w_sw_ev[-1])
+        else:
+            w_sw_ev = np.array([])
+
+        w_hw = _hold(n, hw_idx, w_hw_ev, init_hw[0])
+        w_hw_filt = _hold(n, hw_idx, w_filt_ev, init_hw[1])
+        w_lut = _hold(n, hw_idx, w_lut_ev, init_hw[2])
+        w_sw = _hold(n, sw_idx, w_sw_ev, init_sw)
+        return w_hw, w_hw_filt, w_sw, w_lut
+
+    def run_chunked(self, time, hw_trig, sw_trig, hall_state, chunk_size=250_000):
+        """Feeds full-length (possibly memory-mapped) arrays through process() chunk by chunk."""
+        outputs = [[], [], [], []]
+        for start in range(0, len(time), chunk_size):
+            sl = slice(start, start + chunk_size)
+            res = self.process(time[sl], hw_trig[sl], sw_trig[sl], hall_state[sl])
+            for out, r in zip(outputs, res):
+                out.append(r)
+        return tuple(np.concatenate(out) if out else np.array([]) for out in outputs)
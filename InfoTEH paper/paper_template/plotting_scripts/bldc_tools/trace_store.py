@@ -0,0 +1,201 @@
+"""
+Columnar on-disk cache for the Simulink .mat runs.
+
+Each .mat file is parsed with scipy.io.loadmat exactly once and every numeric
+channel is written to its own .npy file next to it:
+
+    mat_files/.trace_cache/<run name>/time.npy
+    mat_files/.trace_cache/<run name>/hardware_ISR.npy
+    ...
+    mat_files/.trace_cache/<run name>/manifest.json
+
+Later loads open the channels with np.load(mmap_mode='r'), so a script that only
+needs 'time' and 'hardware_ISR' only touches those bytes on disk.
+
+read_window goes one step further for the transient figures: it binary-searches
+the (monotonic) time channel and copies out only the samples of a time window,
+so a 40 ms plot of a 1.5 s run reads a few hundred kB instead of the whole run.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import scipy.io as sio
+
+CACHE_DIR_NAME = '.trace_cache'
+MANIFEST_NAME = 'manifest.json'
+
+
+def cache_dir(mat_path):
+    """Folder holding the converted channels of a .mat run."""
+    mat_path = Path(mat_path)
+    return mat_path.parent / CACHE_DIR_NAME / mat_path.stem
+
+
+def _source_stamp(mat_path):
+    st = os.stat(mat_path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _file_hash(path, block=1 << 20):
+    """sha256 of a file's contents (keys the derived-channel cache)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_manifest(folder):
+    try:
+        with open(folder / MANIFEST_NAME, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(manifest, mat_path):
+    if manifest is None or 'sha256' not in manifest:
+        return False
+    return manifest.get('source') == _source_stamp(mat_path)
+
+
+def convert_mat(mat_path, force=False):
+    """
+    Converts a .mat run into one contiguous .npy file per channel.
+    Does nothing if the cache is already up to date with the source file.
+    Returns the manifest (source stamp and sha256, channel name -> dtype / length).
+    """
+    mat_path = Path(mat_path)
+    folder = cache_dir(mat_path)
+    manifest = _read_manifest(folder)
+    if not force and _is_fresh(manifest, mat_path):
+        return manifest
+
+    folder.mkdir(parents=True, exist_ok=True)
+    mat = sio.loadmat(str(mat_path))
+
+    channels = {}
+    for key, val in mat.items():
+        if key.startswith('__') or not isinstance(val, np.ndarray):
+            continue
+        # Skip MATLAB objects / structs / strings (e.g. Simulink.Parameter)
+        if val.dtype.kind not in 'biuf':
+            continue
+        arr = np.ascontiguousarray(val.ravel())
+        # Via a temporary file, so parallel figure builds can convert the same run
+        tmp = folder / f'{key}.{os.getpid()}.tmp.npy'
+        np.save(tmp, arr)
+        os.replace(tmp, folder / f'{key}.npy')
+        channels[key] = {'dtype': arr.dtype.str, 'length': int(arr.size)}
+
+    manifest = {'source': _source_stamp(mat_path), 'sha256': _file_hash(mat_path),
+                'channels': channels}
+    # Manifest is written last (and atomically) so a half-written cache is never seen as fresh
+    tmp = folder / (MANIFEST_NAME + f'.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, folder / MANIFEST_NAME)
+    return manifest
+
+
+def list_channels(mat_path):
+    """Names of the numeric channels stored in a run."""
+    return list(convert_mat(mat_path)['channels'])
+
+
+def open_trace(mat_path, channels=None):
+    """
+    Returns {name: np.memmap} for the requested channels (all channels if None).
+    Channels that are not present in the run are left out of the dict, so the
+    usual `if 'theta_r' in data` checks keep working.
+    Raises FileNotFoundError if the .mat file does not exist.
+    """
+    mat_path = Path(mat_path)
+    if not mat_path.exists():
+        raise FileNotFoundError(f"File '{mat_path}' not found.")
+
+    manifest = convert_mat(mat_path)
+    folder = cache_dir(mat_path)
+    names = manifest['channels'] if channels is None else channels
+
+    data = {}
+    for name in names:
+        if name in manifest['channels']:
+            data[name] = np.load(folder / f'{name}.npy', mmap_mode='r')
+    return data
+
+
+def load_channels(mat_path, keys):
+    """Same as open_trace, but raises KeyError if any of `keys` is missing."""
+    data = open_trace(mat_path, keys)
+    missing = [k for k in keys if k not in data]
+    if missing:
+        raise KeyError(f"Channels {missing} not found in {Path(mat_path).name}")
+    return data
+
+
+def window_slice(time, t_start, t_stop):
+    """Index slice of the samples with t_start <= time <= t_stop (time sorted)."""
+    lo = int(np.searchsorted(time, t_start, side='left'))
+    hi = int(np.searchsorted(time, t_stop, side='right'))
+    return slice(lo, max(lo, hi))
+
+
+def _uniform_slice(t0, t1, n, t_start, t_stop):
+    """window_slice for n samples spread uniformly over [t0, t1]."""
+    if n < 2 or t1 <= t0:
+        return slice(0, n)
+    step = (t1 - t0) / (n - 1)
+    lo = int(np.clip(np.ceil((t_start - t0) / step), 0, n))
+    hi = int(np.clip(np.floor((t_stop - t0) / step) + 1, 0, n))
+    return slice(lo, max(lo, hi))
+
+
+def source_hash(mat_path):
+    """sha256 of the .mat file, as recorded when it was converted."""
+    return convert_mat(mat_path)['sha256']
+
+
+def read_window(mat_path, channels, t_start, t_stop, pad=0.0):
+    """
+    Reads only the samples with t_start - pad <= time <= t_stop + pad.
+    Returns {name: ndarray} with 'time' and every requested channel present in
+    the run (missing ones are left out, as in open_trace).
+
+    A channel whose length differs from 'time' (logged at another rate) is
+    taken to span time[0]..time[-1] uniformly, and its own time vector is
+    returned as '<name>_time' (see channel_time).
+    """
+    data = open_trace(mat_path, ['time'] + [c for c in channels if c != 'time'])
+    if 'time' not in data:
+        raise KeyError(f"Channel 'time' not found in {Path(mat_path).name}")
+    return slice_window(data, t_start, t_stop, pad)
+
+
+def slice_window(data, t_start, t_stop, pad=0.0):
+    """read_window for an already opened {name: array} dict holding 'time'."""
+    time = data['time']
+    t_lo, t_hi = t_start - pad, t_stop + pad
+    sl = window_slice(time, t_lo, t_hi)
+
+    out = {'time': np.array(time[sl])}
+    for name, arr in data.items():
+        if name == 'time':
+            continue
+        if len(arr) == len(time):
+            out[name] = np.array(arr[sl])
+            continue
+        t0, t1 = float(time[0]), float(time[-1])
+        sl_c = _uniform_slice(t0, t1, len(arr), t_lo, t_hi)
+        out[name] = np.array(arr[sl_c])
+        step = (t1 - t0) / (len(arr) - 1) if len(arr) > 1 else 0.0
+        out[f'{name}_time'] = t0 + step * np.arange(sl_c.start, sl_c.stop)
+    return out
+
+
+def channel_time(data, name):
+    """Time vector of a channel returned by read_window."""
+    return data.get(f'{name}_time', data['time'])
@@ -0,0 +1,84 @@
+import argparse
+from pathlib import Path
+
+from bldc_tools.figure_build import build
+
+# --- CONFIGURATION ---
+ROOT = Path(__file__).resolve().parent
+
+# Paths are relative to plotting_scripts; inputs may be glob patterns.
+# Keep 'inputs' in sync with the files each script opens.
+FIGURES = [
+    # Paper figures (figures/)
+    {'name': '0_intro_misalignment', 'script': 'figures/0_intro_misalignment.py',
+     'inputs': ['mat_files/phase_alignment_LUT.mat'],
+     'outputs': ['figures/0_intro_misalignment.png']},
+    {'name': '1_phase_alignment', 'script': 'figures/1_phase_alignment.py',
+     'inputs': ['mat_files/phase_alignment_LUT.mat'],
+     'outputs': ['figures/1_phase_alignment.png']},
+    {'name': '2_tpa_comparison', 'script': 'figures/2_tpa_comparison.py',
+     'inputs': ['mat_files/phase_alignment_LUT.mat'],
+     'outputs': ['figures/2_tpa_comparison.png', 'figures/2_tpa_kt_vs_time.png']},
+    {'name': '3_startup', 'script': 'figures/3_startup.py',
+     'inputs': ['mat_files/*_from_startup.mat', 'mat_files/no_misalignment_MTPA.mat'],
+     'outputs': ['figures/3_startup.png']},
+    {'name': '3_startup_speed', 'script': 'figures/3_startup_speed.py',
+     'inputs': ['mat_files/*_from_startup.mat', 'mat_files/no_misalignment_MTPA.mat'],
+     'outputs': ['figures/3_startup_speed.png']},
+    {'name': '4_torque_step', 'script': 'figures/4_torque_step.py',
+     'inputs': ['mat_files/*_torque_step_0_1_1s.mat'],
+     'outputs': ['figures/4_torque_step.png']},
+
+    # Transient plots (mat_files_v2/)
+    {'name': '0_transient_speed', 'script': '0_transient_speed.py',
+     'inputs': ['mat_files_v2/*_speed_transient_MTPA_*.mat'],
+     'outputs': ['Plot_MTPA_off.png', 'Plot_MTPA_on.png']},
+    {'name': '1_speed_estimation', 'script': '1_speed_estimation.py',
+     'inputs': ['mat_files_v2/*_speed_transient_MTPA_*.mat'],
+     'outputs': ['figures/Speed_Estimation_MTPA_off.png', 'figures/Speed_Estimation_MTPA_on.png']},
+    {'name': '2_transient_torque', 'script': '2_transient_torque.py',
+     'inputs': ['mat_files_v2/*_torque_transient_MTPA_*.mat'],
+     'outputs': ['figures/Torque_Transient_MTPA_on.png']},
+    {'name': '3_hall_states_corrected', 'script': '3_hall_states_corrected.py',
+     'inputs': ['mat_files_v2/hall_sensor_run.mat'],
+     'outputs': ['figures/Hall_State_before_after.png']},
+
+    # Older root plots (mat_files/)
+    {'name': 'alignment_plot', 'script': 'plot_alignment_lut.py',
+     'inputs': ['mat_files/transient_run_lut1.mat'],
+     'outputs': ['figures/alignment_plot.png']},
+    {'name': 'hall_sensor_comparison_paper', 'script': 'plot_hall_paper.py',
+     'inputs': ['mat_files/hall_data_extracted.mat'],
+     'outputs': ['figures/hall_sensor_comparison_paper.png']},
+    {'name': 'torque_comparison_paper', 'script': 'plot_torque_comparison_v2.py',
+     'inputs': ['mat_files/torque_run_*.mat'],
+     'outputs': ['figures/torque_comparison_paper.png']},
+    {'name': 'current_transient_paper', 'script': 'plot_transient_paper.py',
+     'inputs': ['mat_files/transient_run_lut1.mat'],
+     'outputs': ['figures/current_transient_paper.png']},
+    {'name': 'current_transient_comparison', 'script': 'plot_transient_comparison.py',
+     'inputs': ['mat_files/transient_run_lut0.mat', 'mat_files/transient_run_lut1.mat'],
+     'outputs': ['figures/current_transient_stacked_inset.png', 'figures/current_transient_compare.png']},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-render the figures whose inputs changed.")
+    parser.add_argument('names', nargs='*', help="figures to consider (default: all)")
+    parser.add_argument('-f', '--force', action='store_true', help="re-render even if up to date")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="parallel scripts (default: CPU count)")
+    parser.add_argument('-n', '--dry-run', action='store_true', help="only list stale figures")
+    args = parser.parse_args()
+
+    results = build(FIGURES, ROOT, names=args.names, force=args.force,
+                    max_workers=args.jobs, dry_run=args.dry_run)
+
+    for r in results:
+        print(f"{r['name']:32s} {r['status']:10s} {r['seconds']:6.1f} s")
+    n_failed = sum(r['status'] == 'failed' for r in results)
+    if n_failed:
+        print(f"{n_failed} figure(s) failed")
+
+
+if __name__ == "__main__":
+    main()
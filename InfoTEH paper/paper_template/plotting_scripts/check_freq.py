@@ -2,6 +2,8 @@ import scipy.io
 import numpy as np
 import os
 
+from bldc_tools.freq_tracker import track_frequency
+
 def analyze(tag):
     fpath = os.path.join('mat_files', f'torque_run_{tag}.mat')
     if not os.path.exists(fpath):
@@ -12,22 +14,19 @@ def analyze(tag):
     t = mat['time'].flatten()
     ia = mat['i_a'].flatten()
     
-    # Calculate Frequency based on zero crossings
-    # Remove DC offset
-    ia_ac = ia - np.mean(ia)
-    hz_crossings = np.where(np.diff(np.sign(ia_ac)))[0]
+    # Track the fundamental over time (sliding single-bin DFT), so speed
+    # transients show up as a range instead of skewing one average
+    window_s = min(0.02, 0.5 * (t[-1] - t[0]))
+    track = track_frequency(t, ia, window_s=window_s, hop_s=window_s / 10)
     
-    if len(hz_crossings) > 1:
-        # Distance between crossings
-        diffs = np.diff(t[hz_crossings])
-        avg_half_period = np.mean(diffs)
-        period = 2 * avg_half_period
-        freq = 1 / period
+    if len(track['f0']) > 0:
+        freq = np.median(track['f0'])
         print(f"[{tag}] Time Range: {t[0]:.4f} to {t[-1]:.4f} s")
-        print(f"[{tag}] Est. Frequency: {freq:.2f} Hz")
+        print(f"[{tag}] Est. Frequency: {freq:.2f} Hz "
+              f"(min {track['f0'].min():.2f}, max {track['f0'].max():.2f})")
         print(f"[{tag}] Num Cycles in 4ms: {freq * 0.004:.2f}")
     else:
-        print(f"[{tag}] Not enough zero crossings to estimate frequency.")
+        print(f"[{tag}] Run too short to estimate frequency.")
 
 analyze('uncomp')
 analyze('mtpa')
@@ -1,7 +1,13 @@
 import numpy as np
 import scipy.io
 import matplotlib.pyplot as plt
-from scipy.signal import butter, filtfilt
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bldc_tools.crossings import zero_crossings
+from bldc_tools.fundamental import fundamental
+from bldc_tools.demod import phase_lag
 
 # --- Configuration ---
 MAT_FILE = r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\mat_files\phase_alignment_LUT.mat"
@@ -22,6 +28,7 @@ try:
     omega_r = data['omega_r'].flatten()
 except KeyError:
     raise ValueError(f"Required keys not found. Available: {data.keys()}")
+theta_r = data['theta_r'].flatten() if 'theta_r' in data else None
 
 # --- Helper Functions ---
 def get_fundamental_chunk(t_full, i_full, omega_full, target_time, plot_duration):
@@ -42,14 +49,8 @@ def get_fundamental_chunk(t_full, i_full, omega_full, target_time, plot_duration
     if len(t_chunk) == 0:
         return None, None, None, None
         
-    dt = np.mean(np.diff(t_chunk))
-    fs = 1 / dt
-    
-    low = (f_est * 0.5) / (0.5 * fs)
-    high = (f_est * 1.5) / (0.5 * fs)
-
-    b, a = butter(2, [low, high], btype='band')
-    i_fund_chunk = filtfilt(b, a, i_chunk)
+    # Zero-phase band-pass 0.5 .. 1.5 f_est (design cached across panels)
+    i_fund_chunk = fundamental(t_chunk, i_chunk, f_est)
     
     mask_plot = (t_chunk >= target_time) & (t_chunk <= target_time + plot_duration)
     
@@ -85,12 +86,7 @@ def plot_panel(ax, t_win, i_win, i_fund, e_win, label_suffix, show_legend=False)
     return ax, ax2, t_plot, i_win, i_fund, e_win
 
 def find_zero_crossing_falling(time, y):
-    crossings = []
-    for i in range(len(y)-1):
-        if y[i] > 0 and y[i+1] <= 0:
-            frac = y[i] / (y[i] - y[i+1])
-            crossings.append(time[i] + frac * (time[i+1] - time[i]))
-    return crossings
+    return zero_crossings(time, y, direction='falling')[0]
 
 # --- Main Plotting ---
 fig, axes = plt.subplots(3, 1, figsize=(8, 10), constrained_layout=True)
@@ -150,6 +146,14 @@ for i, pt in enumerate(points):
     
     saved_data.append((t_r, i_r, if_r, e_r, ax, ax2))
 
+# Numeric phase lag of i_as vs e_as (synchronous demodulation on theta_r)
+if theta_r is not None:
+    lag = phase_lag(t, i_as, e_as, theta_r)
+    for pt, period in zip(points, periods):
+        win = (t >= pt['time']) & (t <= pt['time'] + 2.3 * period)
+        dphi = np.rad2deg(np.angle(np.mean(np.exp(1j * lag['dphi'][win]))))
+        print(f"{pt['label']}: dphi = {dphi:+.1f} deg (i_as vs e_as)")
+
 # Use common ref_x
 ref_x = align_offset * 1000
 
@@ -1,10 +1,17 @@
 import numpy as np
 import scipy.io
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bldc_tools.crossings import cycle_starts
+from bldc_tools.cycle_stats import cycle_stats, kt_trace
 
 # --- Configuration ---
 MAT_FILE = r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\mat_files\phase_alignment_LUT.mat"
 OUTPUT_FILE = r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\figures\2_tpa_comparison.png"
+KT_TRACE_FILE = r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\figures\2_tpa_kt_vs_time.png"
 
 # --- Load Data ---
 data = scipy.io.loadmat(MAT_FILE)
@@ -16,19 +23,6 @@ try:
 except KeyError as e:
     raise ValueError(f"Required keys not found: {e}")
 
-def find_cycles(time, signal, min_freq=5.0):
-    zcs = []
-    min_period = 1.0 / min_freq
-    last_t = -min_period
-    for i in range(len(signal) - 1):
-        if signal[i] <= 0 and signal[i+1] > 0:
-            if time[i] - last_t > min_period * 0.5:
-                frac = -signal[i] / (signal[i+1] - signal[i])
-                zc_t = time[i] + frac * (time[i+1] - time[i])
-                zcs.append((i, zc_t))
-                last_t = zc_t
-    return zcs
-
 # --- Main Plotting ---
 cases = [
     {'label': 'Uncompensated', 'time': 0.4,  'color': '#0072BD'}, 
@@ -75,21 +69,10 @@ for c in cases:
             
         means.append(abs(ratio))
         
-        # Cycles
-        idx_cycles = find_cycles(t_win, i_win)
-        cycle_ratios = []
-        for k in range(len(idx_cycles)-1):
-            s, e = idx_cycles[k][0], idx_cycles[k+1][0]
-            ic = i_win[s:e]
-            ec = e_win[s:e]
-            wc = w_win[s:e]
-            if len(ic) > 5:
-                Irms_c = np.sqrt(np.mean(ic**2))
-                Pavg_c = np.mean(3.0 * ec * ic)
-                w_mc = np.mean(wc) / POLE_PAIRS
-                
-                if Irms_c > 0.01 and abs(w_mc) > 1e-3:
-                    cycle_ratios.append(abs((Pavg_c/w_mc)/Irms_c))
+        # Cycles (all cycles of the window at once, see bldc_tools/cycle_stats.py)
+        idx_cycles, _ = cycle_starts(t_win, i_win)
+        cyc = cycle_stats(i_win, e_win, w_win, idx_cycles, pole_pairs=POLE_PAIRS)
+        cycle_ratios = cyc['kt'][cyc['valid']]
                     
         if len(cycle_ratios) > 2:
             stds.append(np.std(cycle_ratios))
@@ -127,3 +110,28 @@ ax.set_ylim([0.160, 0.180])
 
 plt.savefig(OUTPUT_FILE, dpi=300)
 print(f"Figure saved to {OUTPUT_FILE}")
+
+# --- Kt of every cycle over the whole run ---
+print("Calculating per-cycle Kt over the run...")
+kt = kt_trace(t, i_a, e_a, omega_r, pole_pairs=POLE_PAIRS)
+
+kt_valid = kt['kt'][kt['valid']]
+
+fig2, ax = plt.subplots(figsize=(8, 4), constrained_layout=True)
+ax.plot(kt['t_mid'][kt['valid']], kt_valid, '.-', color='k', markersize=2, linewidth=0.6)
+for c in cases:
+    ax.axvspan(c['time'], c['time'] + 0.2, color=c['color'], alpha=0.25, label=c['label'])
+
+ax.set_xlabel('Time (s)', fontsize=12)
+ax.set_ylabel(r'$K_t$ per cycle (N$\cdot$m/A rms)', fontsize=12)
+# Limits from the cycles themselves (start-up and step transients included),
+# ignoring the odd outlier cycle
+if len(kt_valid) > 0:
+    lo, hi = np.percentile(kt_valid, [1, 99])
+    margin = 0.1 * (hi - lo) if hi > lo else 0.005
+    ax.set_ylim([lo - margin, hi + margin])
+ax.grid(True, linestyle='--', alpha=0.6)
+ax.legend(loc='lower right', fontsize=10)
+
+plt.savefig(KT_TRACE_FILE, dpi=300)
+print(f"Figure saved to {KT_TRACE_FILE}")
@@ -1,8 +1,12 @@
 import numpy as np
-import scipy.io
 import matplotlib.pyplot as plt
 import os
 import scipy.signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bldc_tools.trace_store import open_trace
+from bldc_tools.derived import open_channels
 
 # --- Configuration ---
 DATA_DIR = r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\mat_files"
@@ -18,16 +22,6 @@ FILES = [
 
 POLE_PAIRS = 4
 
-# --- Helper: Park Transform ---
-def calc_id(i_a, i_b, i_c, theta_r):
-    # i_d = 2/3 * (ia*cos(theta) + ib*cos(theta-2pi/3) + ic*cos(theta+2pi/3))
-    cos_t = np.cos(theta_r)
-    cos_tm = np.cos(theta_r - 2*np.pi/3)
-    cos_tp = np.cos(theta_r + 2*np.pi/3)
-    
-    id_val = (2/3) * (i_a*cos_t + i_b*cos_tm + i_c*cos_tp)
-    return id_val
-
 # --- Main Plotting ---
 fig, ax_arr = plt.subplots(3, 1, figsize=(8, 10), constrained_layout=True, sharex=True)
 ax1, ax2, ax3 = ax_arr
@@ -41,13 +35,13 @@ for f in FILES:
         continue
         
     try:
-        data = scipy.io.loadmat(path)
-        t = data['time'].flatten()
+        data = open_trace(path)
+        t = data['time']
         
         if 'rotor_speed' in data:
-            spd = data['rotor_speed'].flatten()
+            spd = data['rotor_speed']
         elif 'omega_r' in data:
-            spd = data['omega_r'].flatten() * (60 / (2*np.pi * POLE_PAIRS))
+            spd = data['omega_r'] * (60 / (2*np.pi * POLE_PAIRS))
         else:
             continue
             
@@ -67,16 +61,16 @@ ax1.set_title('(a) Startup Speed Comparison', loc='left', fontsize=12, fontweigh
 print("Plotting LUT Currents...")
 lut_path = os.path.join(DATA_DIR, 'LUT_from_startup.mat')
 if os.path.exists(lut_path):
-    data = scipy.io.loadmat(lut_path)
-    t = data['time'].flatten()
+    # i_d (Park transform) is computed once per run and cached with the trace
+    data = open_channels(lut_path, ['time', 'i_a', 'i_b', 'i_c', 'i_d'])
+    t = data['time']
     mask = t <= 0.2
     
     # Extract
     t_plot = t[mask]*1000
-    ia = data['i_a'].flatten()[mask]
-    ib = data['i_b'].flatten()[mask]
-    ic = data['i_c'].flatten()[mask]
-    theta = data['theta_r'].flatten()[mask]
+    ia = data['i_a'][mask]
+    ib = data['i_b'][mask]
+    ic = data['i_c'][mask]
     
     # Ax2: Phase Currents
     ax2.plot(t_plot, ia, label=r'$i_a$', color='#0072BD', linewidth=1.0)
@@ -89,7 +83,7 @@ if os.path.exists(lut_path):
     ax2.set_title('(b) LUT Phase Currents', loc='left', fontsize=12, fontweight='bold')
     
     # Ax3: D-axis Current
-    id_raw = calc_id(ia, ib, ic, theta)
+    id_raw = data['i_d'][mask]
     
     # Filter for Avg
     try:
@@ -1,7 +1,12 @@
 import numpy as np
-import scipy.io
 import matplotlib.pyplot as plt
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bldc_tools.trace_store import slice_window
+from bldc_tools.derived import open_channels
 
 # --- Configuration ---
 DATA_DIR = r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\mat_files"
@@ -13,21 +18,11 @@ FILES = [
     {'name': 'LUT_torque_step_0_1_1s.mat',    'label': 'LUT Correction',   'color': '#EDB120'}  # Yellow
 ]
 
-POLE_PAIRS = 4
-
-def derive_torque_active_power(d):
-    # T = (3 * e_a * i_a) / (w_r / P)
-    e_a = d['e_a']
-    i_a = d['i_a']
-    w_r = d['w_r']
-    
-    w_m = w_r / POLE_PAIRS
-    T = np.zeros_like(e_a)
-    
-    # Avoid div by zero
-    mask = np.abs(w_m) > 1.0 # 1 rad/s threshold
-    T[mask] = (3.0 * e_a[mask] * i_a[mask]) / w_m[mask]
-    return T
+# The step is searched for inside this window around 1.0 s and plotted from
+# PLOT_BEFORE_S before to PLOT_AFTER_S after it; only those samples are read
+SEARCH_WINDOW_S = (0.9, 1.1)
+PLOT_BEFORE_S = 0.005
+PLOT_AFTER_S = 0.080
 
 # --- Load Data ---
 data_list = []
@@ -38,20 +33,20 @@ for f in FILES:
         continue
     
     try:
-        mat = scipy.io.loadmat(path)
+        # T_e_power = 3 * e_a * i_a / w_m is derived once per run and cached
+        # Channels stay memory-mapped; the windows are sliced out below
+        mat = open_channels(path, ['time', 'omega_r', 'T_e_power', 'T_e'])
         item = {'label': f['label'], 'color': f['color']}
         
-        item['t'] = mat['time'].flatten()
+        item['t'] = mat['time']
         
         # Keys check
-        if 'omega_r' in mat and 'i_a' in mat and 'e_a' in mat:
-             item['w_r'] = mat['omega_r'].flatten()
-             item['i_a'] = mat['i_a'].flatten()
-             item['e_a'] = mat['e_a'].flatten()
-             item['T_e'] = derive_torque_active_power(item)
+        if 'omega_r' in mat and 'T_e_power' in mat:
+             item['w_r'] = mat['omega_r']
+             item['T_e'] = mat['T_e_power']
         elif 'T_e' in mat:
-             item['w_r'] = mat['omega_r'].flatten()
-             item['T_e'] = mat['T_e'].flatten()
+             item['w_r'] = mat['omega_r']
+             item['T_e'] = mat['T_e']
         else:
             print(f"Missing required keys in {f['name']}")
             continue
@@ -66,34 +61,30 @@ if not data_list:
 # --- Find Step Time around 1.0s ---
 # Use LUT dataset
 ref_data = data_list[-1] 
-t = ref_data['t']
-w = ref_data['w_r']
-
-# Look in 0.9 to 1.1 region
-mask_search = (t > 0.9) & (t < 1.1)
-if not np.any(mask_search):
-     print("Warning: No data in 0.9-1.1s. Finding global max.")
-     mask_search = np.ones_like(t, dtype=bool)
+search = slice_window({'time': ref_data['t'], 'w_r': ref_data['w_r']}, *SEARCH_WINDOW_S)
+if len(search['time']) < 2:
+     print(f"Warning: No data in {SEARCH_WINDOW_S[0]}-{SEARCH_WINDOW_S[1]}s. Finding global max.")
+     search = {'time': np.asarray(ref_data['t']), 'w_r': np.asarray(ref_data['w_r'])}
 
-t_sub = t[mask_search]
-w_sub = w[mask_search]
+t_sub = search['time']
+w_sub = search['w_r']
 dw = np.diff(w_sub)
 step_idx = np.argmax(np.abs(dw))
 step_time = t_sub[step_idx]
 print(f"Detected step at t={step_time:.4f}s")
 
 # Define Window: -5ms to +80ms from step
-t_start = step_time - 0.005
-t_end = step_time + 0.080
+t_start = step_time - PLOT_BEFORE_S
+t_end = step_time + PLOT_AFTER_S
 
 # --- Plotting ---
 fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(7, 6), sharex=True, constrained_layout=True)
 
 for d in data_list:
-    mask = (d['t'] >= t_start) & (d['t'] <= t_end)
-    t_plot = d['t'][mask]
-    w_plot = d['w_r'][mask]
-    T_plot = d['T_e'][mask]
+    win = slice_window({'time': d['t'], 'w_r': d['w_r'], 'T_e': d['T_e']}, t_start, t_end)
+    t_plot = win['time']
+    w_plot = win['w_r']
+    T_plot = win['T_e']
     
     if len(t_plot) == 0: continue
 
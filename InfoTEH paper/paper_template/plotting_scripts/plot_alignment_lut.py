@@ -1,9 +1,10 @@
 import scipy.io
-import scipy.signal
 import matplotlib.pyplot as plt
 import numpy as np
 import os
 
+from bldc_tools.fundamental import fundamental_tracking, sample_rate
+
 FILE_INPUT = os.path.join('mat_files', 'transient_run_lut1.mat')
 OUTPUT_DIR = 'figures'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -58,14 +59,15 @@ def load_data(fpath):
     else:
         eas = eas[:L]
         
-    dt = np.mean(np.diff(t))
-    fs = 1/dt
+    fs = sample_rate(t)
+    # Electrical speed from the theta_r slope, so the band follows the speed
+    # through the uncompensated / LUT / MTPA stages instead of one run-average
+    # frequency (fundamental_tracking averages it over each block)
     th_u = np.unwrap(theta)
-    w = (th_u[-1]-th_u[0]) / (t[-1]-t[0])
-    f0 = w / (2*np.pi)
+    w_r = np.gradient(th_u, t)
+    f0 = (th_u[-1] - th_u[0]) / (t[-1] - t[0]) / (2 * np.pi)
     
-    sos = scipy.signal.butter(2, [0.8*f0, 1.2*f0], btype='bandpass', fs=fs, output='sos')
-    ia_fund = scipy.signal.sosfiltfilt(sos, ia)
+    ia_fund, _, _ = fundamental_tracking(t, ia, w_r, band=(0.8, 1.2))
     
     return t, ia, ia_fund, eas, fs, f0
 
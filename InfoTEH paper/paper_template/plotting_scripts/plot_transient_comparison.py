@@ -2,7 +2,8 @@ import scipy.io
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-from sklearn.linear_model import LinearRegression
+
+from bldc_tools.decay_fit import fit_decay
 
 # Configuration
 FILE_LUT0 = os.path.join('mat_files', 'transient_run_lut0.mat')
@@ -29,6 +30,9 @@ T_DECAY_START = T_DECAY_MAX_MS - right_span
 
 time_scale = 1000.0
 
+# i_ds_avg decay fit window (ms after T_START_OFFSET)
+TAU_WINDOW_MS = (80, 350)
+
 def load_data(fpath):
     if not os.path.exists(fpath): return None
     mat = scipy.io.loadmat(fpath)
@@ -50,23 +54,9 @@ def load_data(fpath):
     return t[:L], ia[:L], ids, ids_avg[:L]
 
 def calculate_tau(t_ms, y):
-    start_ms = 80 
-    end_ms = 350
-    mask = (t_ms >= start_ms) & (t_ms <= end_ms) & (y > 0.1)
-    
-    if np.sum(mask) < 10: return None
-    
-    t_fit = t_ms[mask]
-    y_fit = y[mask]
-    
-    model = LinearRegression()
-    X = t_fit.reshape(-1, 1)
-    Y = np.log(y_fit)
-    model.fit(X, Y)
-    
-    slope = model.coef_[0]
-    tau_ms = -1.0 / slope
-    return tau_ms
+    """tau (ms) of every row of y over TAU_WINDOW_MS, None where it cannot be fitted."""
+    fit = fit_decay(t_ms, np.atleast_2d(y), TAU_WINDOW_MS)
+    return [None if np.isnan(tau) else tau for tau in fit['tau']]
 
 def plot_row(ax_detail, ax_decay, t, i_a, i_ds, i_ds_avg, title_labels, letter):
     t_ms = (t - T_START_OFFSET) * time_scale
@@ -158,8 +148,7 @@ def plot_all():
     avg1 = avg1[:L]
     diff = avg1 - avg0
     
-    tau0 = calculate_tau(t0_ms, avg0)
-    tau1 = calculate_tau(t0_ms, avg1)
+    tau0, tau1 = calculate_tau(t0_ms, np.vstack([avg0, avg1]))
     
     fig2, (ax_main, ax_diff) = plt.subplots(2, 1, figsize=(10, 6), sharex=True, constrained_layout=True, gridspec_kw={'height_ratios': [2, 1]})
     
@@ -3,6 +3,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import scipy.io
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PARENT_DIR = os.path.dirname(BASE_DIR)
@@ -12,6 +13,9 @@ if not os.path.exists(OUTPUT_DIR):
 
 MAT_FILES_V2 = os.path.join(PARENT_DIR, 'mat_files_v2')
 
+sys.path.insert(0, PARENT_DIR)
+from bldc_tools.plot_lod import lod_plot
+
 # Standard Voltage Files
 STD_FILES = {
     'LUT': os.path.join(MAT_FILES_V2, 'LUT_transient_voltage.mat'),
@@ -39,7 +43,7 @@ for label, path in STD_FILES.items():
         if speed is not None:
              # Length Matching
              n = min(len(time), len(speed))
-             plt.plot(time[:n], speed[:n], label=label, linewidth=1)
+             lod_plot(plt.gca(), time[:n], speed[:n], dpi=300, label=label, linewidth=1)
              
     except Exception as e:
         print(f"Error loading {label}: {e}")
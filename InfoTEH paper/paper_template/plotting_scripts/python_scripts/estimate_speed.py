@@ -3,10 +3,18 @@ import numpy as np
 import matplotlib.pyplot as plt
 import scipy.io
 import os
+import sys
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PARENT_DIR = os.path.dirname(BASE_DIR)
+sys.path.insert(0, PARENT_DIR)
+from bldc_tools.hall_emulator import emulate_hall
+from bldc_tools.speed_estimator import StreamingSpeedEstimator
+from bldc_tools.sector_average import make_estimators, run_estimators
+from bldc_tools.position_interp import (error_stats, interpolate_position, position_error,
+                                        sector_start_angles)
+from bldc_tools.plot_lod import lod_plot
 OUTPUT_DIR = os.path.join(PARENT_DIR, 'figures')
 
 if not os.path.exists(OUTPUT_DIR):
@@ -23,90 +31,10 @@ FILES = {
 LUT_ANGLES_DEG = np.array([56.0118, 58.0088, 66.0015, 56.0012, 58.0077, 66.0060])
 # Note: User provided 6 angles.
 
-class SpeedEstimator:
-    def __init__(self, lut_vals_deg):
-        self.t_prev_hw = None
-        self.t_prev_sw = None
-        # Initialize stores
-        self.w_hw_store = 0.0
-        self.w_hw_filt_store = 0.0
-        self.w_sw_store = 0.0
-        self.w_lut_store = 0.0
-        self.dt_filt_store = 0.0
-        
-        self.prev_hall_state = 1
-        self.prev_hw_trig = 0
-        self.prev_sw_trig = 0
-        
-        self.PI_over_3 = np.pi / 3.0
-        self.ALPHA = 0.05
-        
-        self.lut_vals_rad = np.deg2rad(lut_vals_deg)
-
-    def update(self, timer, hw_trig, sw_trig, hall_state):
-        # Convert inputs to simple types
-        hw_trig = int(hw_trig)
-        sw_trig = int(sw_trig)
-        hall_state = int(hall_state)
-        
-        debug_angle = 0.0
-        
-        # Edge Detection
-        trig_hw_now = (hw_trig > 0) and (self.prev_hw_trig == 0)
-        trig_sw_now = (sw_trig > 0) and (self.prev_sw_trig == 0)
-        
-        self.prev_hw_trig = hw_trig
-        self.prev_sw_trig = sw_trig
-        
-        if self.t_prev_hw is None:
-             self.t_prev_hw = float(timer)
-             self.t_prev_sw = float(timer)
-             return 0, 0, 0, 0
-        
-        # --- HARDWARE ISR ---
-        if trig_hw_now:
-            dt_hw = float(timer) - self.t_prev_hw
-            if dt_hw > 1e-6:
-                # 1. Raw HW
-                self.w_hw_store = self.PI_over_3 / dt_hw
-                
-                # 2. Filtered
-                if self.dt_filt_store == 0:
-                    self.dt_filt_store = dt_hw
-                else:
-                    self.dt_filt_store = (self.ALPHA * dt_hw) + ((1 - self.ALPHA) * self.dt_filt_store)
-                
-                self.w_hw_filt_store = self.PI_over_3 / self.dt_filt_store
-                
-                # 4. LUT Based
-                # User Logic: idx = mod((prev_hall_state) + 2, 6)
-                # Assumes prev_hall_state is 1-6??
-                # Note: mod in python is %
-                # If hall states are 1-6.
-                # If we map hall indices to 0-5.
-                # Let's try to match User Matrix Indexing.
-                # If Hall State 1 -> Index ?
-                # User: "phi_corr_LUT_param.Value" (list of 6)
-                # Let's assume standard indexing.
-                
-                idx = (self.prev_hall_state - 1 + 2) % 6 
-                # Explanation: prev_hall_state 1..6 -> 0..5. +2 -> shift. %6 -> wrap.
-                
-                actual_angle = self.lut_vals_rad[idx]
-                
-                self.w_lut_store = actual_angle / dt_hw
-                
-                self.t_prev_hw = float(timer)
-                self.prev_hall_state = hall_state
-
-        # --- SOFTWARE ISR ---
-        if trig_sw_now:
-             dt_sw = float(timer) - self.t_prev_sw
-             if dt_sw > 1e-6:
-                 self.w_sw_store = self.PI_over_3 / dt_sw
-                 self.t_prev_sw = float(timer)
-                 
-        return self.w_hw_store, self.w_hw_filt_store, self.w_sw_store, self.w_lut_store
+# Emulated Hall sensor offsets (deg), per sensor A, B, C.
+# State I spans [-30, 30] deg in hall_sensor.m, so +30 deg puts sector 1 at
+# theta_r in [0, 60) deg. Add phi_A/B/C_deg (setup_motor_params.m) for misalignment.
+HALL_OFFSETS_DEG = np.array([30.0, 30.0, 30.0]) + np.array([0.0, 0.0, 0.0])
 
 def run_estimation(file_label, path):
     if not os.path.exists(path):
@@ -126,20 +54,10 @@ def run_estimation(file_label, path):
             print(f"No theta_r in {file_label}")
             return
 
-        # Derive Hall State and Triggers
-        # Hall State: 1..6 based on theta_r
-        # Wrap to 0..2pi
-        theta_wrapped = np.mod(theta_r, 2*np.pi)
-        # Sectors: 0-60 -> 1, 60-120 -> 2...
-        hall_states = np.floor(theta_wrapped / (np.pi/3)).astype(int) + 1
-        hall_states[hall_states > 6] = 6 # floating point safety
-        
-        # Generate HW Trigger (rising edge of hall state change)
-        # Actually any change in hall state is a trigger
-        hw_trigs = np.zeros_like(hall_states, dtype=int)
-        # Find changes
-        diffs = np.diff(hall_states, prepend=hall_states[0])
-        hw_trigs[diffs != 0] = 1
+        # Derive Hall State (sector 1..6) and HW Triggers (any change in hall state)
+        hall = emulate_hall(time, theta_r, HALL_OFFSETS_DEG)
+        hall_states = hall['sector']
+        hw_trigs = hall['hardware_ISR']
         
         # SW Trigger - User MAT file has software_ISR e.g. [0, 1].
         # If available use it, else mimic HW trigger or 1kHz?
@@ -149,30 +67,41 @@ def run_estimation(file_label, path):
         else:
             sw_trigs = np.zeros_like(time, dtype=int)
             
-        estimator = SpeedEstimator(LUT_ANGLES_DEG)
-        
-        w_ests = []     # w_hw
-        w_filts = []    # w_hw_filt
-        w_luts = []     # w_lut
-        
-        for i in range(len(time)):
-            w_h, w_f, w_s, w_l = estimator.update(time[i], hw_trigs[i], sw_trigs[i], hall_states[i])
-            w_ests.append(w_h)
-            w_filts.append(w_f)
-            w_luts.append(w_l)
+        # Event-driven estimator: same outputs as SpeedEstimator.update() per sample,
+        # but only the trigger events run Python code
+        estimator = StreamingSpeedEstimator(LUT_ANGLES_DEG)
+        w_ests, w_filts, _, w_luts = estimator.run_chunked(time, hw_trigs, sw_trigs, hall_states)
+
+        # 3-step / 6-step averaging on the same Hall trace, for comparison
+        family = run_estimators(make_estimators(LUT_ANGLES_DEG), time, hw_trigs, sw_trigs, hall_states)
+
+        # Rotor angle interpolated between edges from each estimate, vs theta_r
+        # (sector 1 starts where the emulated sensors enter State I)
+        edge_idx = np.flatnonzero(hw_trigs)
+        for name, lut in (('LUT', LUT_ANGLES_DEG), ('3_step', None), ('6_step', None)):
+            starts = sector_start_angles(lut, phi_deg=HALL_OFFSETS_DEG)
+            theta_hat = interpolate_position(time, time[edge_idx], hall_states[edge_idx],
+                                             family[name][edge_idx], starts, clamp=True)
+            stats = error_stats(position_error(theta_hat, theta_r))
+            print(f"  {name}: theta error mean {stats['mean']:.2f}, rms {stats['rms']:.2f}, "
+                  f"max {stats['max_abs']:.2f} deg")
             
         # Plot
         plt.figure(figsize=(10, 6))
-        plt.plot(time, w_real, 'k-', linewidth=2, label='Real Speed', alpha=0.6)
-        plt.plot(time, w_ests, 'g--', linewidth=1, label='Raw HW Est')
-        plt.plot(time, w_filts, 'b--', linewidth=1, label='Filtered HW Est')
-        plt.plot(time, w_luts, 'r-', linewidth=1.5, label='LUT Est')
+        ax = plt.gca()
+        # Zoom to transient 1.0s (only the samples in this window are drawn)
+        xlim = (0.8, 1.2)
+        lod_plot(ax, time, w_real, 'k-', xlim=xlim, dpi=300, linewidth=2, label='Real Speed', alpha=0.6)
+        lod_plot(ax, time, w_ests, 'g--', xlim=xlim, dpi=300, linewidth=1, label='Raw HW Est')
+        lod_plot(ax, time, w_filts, 'b--', xlim=xlim, dpi=300, linewidth=1, label='Filtered HW Est')
+        lod_plot(ax, time, w_luts, 'r-', xlim=xlim, dpi=300, linewidth=1.5, label='LUT Est')
+        lod_plot(ax, time, family['3_step'], 'c-', xlim=xlim, dpi=300, linewidth=1, label='3-step Avg Est')
+        lod_plot(ax, time, family['6_step'], 'm-', xlim=xlim, dpi=300, linewidth=1, label='6-step Avg Est')
         
         plt.title(f'Speed Estimation Comparison - {file_label}')
         plt.xlabel('Time (s)')
         plt.ylabel('Speed (rad/s)')
-        # Zoom to transient 1.0s
-        plt.xlim([0.8, 1.2]) 
+        plt.xlim(xlim)
         # Or auto
         plt.legend()
         plt.grid(True)
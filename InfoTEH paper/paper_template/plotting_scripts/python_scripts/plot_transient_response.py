@@ -1,13 +1,16 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import scipy.io
 import os
+import sys
 
 # --- Configuration ---
 # Adjust paths relative to this script location (inside python_scripts)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PARENT_DIR = os.path.dirname(BASE_DIR)
+sys.path.insert(0, PARENT_DIR)
+from bldc_tools.trace_store import list_channels, slice_window
+from bldc_tools.derived import open_channels
 OUTPUT_DIR = os.path.join(PARENT_DIR, 'figures') # Save figures in parent/figures as before? Or python_scripts/figures? 
 # User said "figures" before. Let's keep it in the main plotting_scripts/figures to be consistent with previous runs, or maybe inside python_scripts/figures.
 # "make python scripts in the python_scripts folder" - usually implies running from there.
@@ -24,6 +27,12 @@ if not os.path.exists(OUTPUT_DIR):
 MAT_FILES_V2 = os.path.join(PARENT_DIR, 'mat_files_v2')
 MAT_FILES_V1 = os.path.join(PARENT_DIR, 'mat_files')
 
+# The transient runs step at 1.0 s: only this window is read from disk and
+# searched for the trigger first (None reads the whole run). Runs whose
+# trigger is not crossed inside it are searched again over the whole run.
+STEP_SEARCH_WINDOW_S = (0.8, 1.2)
+LOAD_CHANNELS = ['time', 'rotor_speed', 'omega_r', 'T_e']
+
 # Data Definitions
 # Standard Set
 STD_FILES = {
@@ -75,23 +84,35 @@ LINE_STYLES = {
     '6-Step (MTPA)': '-'
 }
 
-def load_data(path):
+def load_data(path, t_window=None):
     if not os.path.exists(path):
         print(f"File not found: {path}")
         return None
     try:
-        mat = scipy.io.loadmat(path)
+        # Channels are memory-mapped; runs without a logged T_e get the cached
+        # T_e_iq = 1.5 * i_q * e_q / omega_r derived channel instead (divided
+        # by rotor_speed in runs that do not log omega_r)
+        names = list(LOAD_CHANNELS)
+        if 'T_e' not in list_channels(path):
+            names.append('T_e_iq')
+        mat = open_channels(path, names)
+        if 'T_e_iq' in names and 'T_e_iq' not in mat:
+            mat.update(open_channels(path, ['T_e_iq_rotor_speed']))
+        if t_window is not None:
+            # Binary search on 'time', then copy out just the samples in the window
+            mat = slice_window(mat, *t_window)
+
         data = {}
-        data['time'] = mat['time'].flatten() if 'time' in mat else None
+        data['time'] = mat['time'] if 'time' in mat else None
         
         # Length check helper
         n_t = len(data['time']) if data['time'] is not None else 0
         
         # Speed
         if 'rotor_speed' in mat:
-            s = mat['rotor_speed'].flatten()
+            s = mat['rotor_speed']
         elif 'omega_r' in mat:
-            s = mat['omega_r'].flatten()
+            s = mat['omega_r']
         else:
             s = None
         
@@ -106,9 +127,16 @@ def load_data(path):
 
         # Torque
         if 'T_e' in mat:
-            t_val = mat['T_e'].flatten()
+            t_val = mat['T_e']
+        elif 'T_e_iq' in mat:
+            t_val = mat['T_e_iq']
+            print(f"Calculated Torque for {path}")
+        elif 'T_e_iq_rotor_speed' in mat:
+            t_val = mat['T_e_iq_rotor_speed']
+            print(f"Calculated Torque for {path} (from rotor_speed)")
         else:
             t_val = None
+            print(f"Cannot calculate torque for {path}: needs T_e, or i_a, i_b, theta_r, e_q and a speed")
             
         if t_val is not None and len(t_val) != n_t:
             m = min(len(t_val), n_t)
@@ -117,53 +145,6 @@ def load_data(path):
             data['time'] = data['time'][:m]
             if data['speed'] is not None:
                 data['speed'] = data['speed'][:m]
-        elif t_val is None:
-            # Try to calculate Torque: T_e = 1.5 * i_q * e_q / omega_r
-            # Need i_a, i_b, theta_r, e_q, omega_r
-            if all(k in mat for k in ['i_a', 'i_b', 'theta_r', 'e_q']):
-                try:
-                    i_a = mat['i_a'].flatten()[:n_t]
-                    i_b = mat['i_b'].flatten()[:n_t]
-                    theta_r = mat['theta_r'].flatten()[:n_t]
-                    e_q = mat['e_q'].flatten()[:n_t]
-                    
-                    # Using omega_r for scaling is tricky near zero. Use separate check?
-                    # Or simpler: T_e = 1.5 * i_q * (e_q / omega) ?
-                    # If e_q ~ k * w, then e_q/w is constant (Flux).
-                    # Let's rely on T = 1.5 * i_q * Flux.
-                    # We can estimate Flux from e_q / speed where speed is high enough.
-                    # Or just use T_e = 1.5 * i_q * e_q / speed.
-                    
-                    # 1. Clarke (Power invariant? Usually amplitude invariant for these controls)
-                    # i_alpha = i_a
-                    # i_beta = (i_a + 2*i_b) / sqrt(3)
-                    i_alpha = i_a
-                    i_beta = (i_a + 2*i_b) / np.sqrt(3)
-                    
-                    # 2. Park
-                    # i_d = i_alpha * cos(theta) + i_beta * sin(theta)
-                    # i_q = -i_alpha * sin(theta) + i_beta * cos(theta)
-                    sin_t = np.sin(theta_r)
-                    cos_t = np.cos(theta_r)
-                    i_q = -i_alpha * sin_t + i_beta * cos_t
-                    
-                    if data['speed'] is not None:
-                        w = data['speed']
-                        # Avoid div by zero
-                        mask = np.abs(w) > 1.0
-                        te_calc = np.zeros_like(i_q)
-                        te_calc[mask] = 1.5 * i_q[mask] * e_q[mask] / w[mask]
-                        # Fill zeros? Or interpolate?
-                        data['torque'] = te_calc
-                        print(f"Calculated Torque for {path}")
-                    else:
-                        print("Cannot calculate torque: missing speed")
-                        data['torque'] = None
-                except Exception as ex:
-                    print(f"Torque calc failed: {ex}")
-                    data['torque'] = None
-            else:
-                 data['torque'] = None
         else:
             data['torque'] = t_val
             
@@ -209,10 +190,14 @@ def find_step_index(data, trigger_signal='speed', trigger_level=600, trigger_edg
 def plot_stacked_response(file_map, title, filename_suffix, 
                           trigger_signal='speed', trigger_level=600, trigger_edge='rising',
                           x_window=[-0.005, 0.025], 
-                          ylim_speed=None, ylim_torque=None):
+                          ylim_speed=None, ylim_torque=None,
+                          search_window=STEP_SEARCH_WINDOW_S):
     """
     Plots Speed (top) and Torque (bottom) stacked.
     Normalizes time such that the step is at t=0.
+    Only search_window (absolute seconds) of each run is loaded and searched;
+    if the signal is already past the level at its first sample (or never
+    gets there), the whole run is loaded and searched instead.
     """
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(8, 10), sharex=True)
     
@@ -222,12 +207,19 @@ def plot_stacked_response(file_map, title, filename_suffix,
     found_any = False
     
     for label, path in file_map.items():
-        data = load_data(path)
+        data = load_data(path, search_window)
         if data is None or data['time'] is None:
             continue
             
         # Find Step
         idx = find_step_index(data, trigger_signal, trigger_level, trigger_edge)
+        if search_window is not None and not idx:
+            print(f"No crossing inside {search_window[0]}-{search_window[1]}s in {label}, "
+                  f"searching the whole run")
+            data = load_data(path)
+            if data is None or data['time'] is None:
+                continue
+            idx = find_step_index(data, trigger_signal, trigger_level, trigger_edge)
         
         if idx is not None:
              found_any = True
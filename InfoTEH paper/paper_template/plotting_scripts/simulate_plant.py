@@ -0,0 +1,72 @@
+import argparse
+import os
+
+import numpy as np
+
+from bldc_tools.plant import read_motor_params, save_run, simulate_ensemble, simulate_events, split_runs
+
+# --- CONFIGURATION ---
+OUTPUT_DIR = 'mat_files'
+
+# Same length and bus as the Simulink runs (1.5 s, 36 V, initialize_model.m). The
+# plant steps at Ts_motor but records on a 10 us grid unless --record-every / --dt
+# say otherwise; the Simulink runs log every 1 us step.
+T_END_S = 1.5
+V_BUS = 36.0
+T_LOAD = 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Python BLDC plant and save a .mat run.")
+    parser.add_argument('output', nargs='?', default='python_plant_run.mat',
+                        help="file name inside mat_files/")
+    parser.add_argument('-t', '--t-end', type=float, default=T_END_S, help="simulated time (s)")
+    parser.add_argument('--v-bus', type=float, default=V_BUS, help="DC bus voltage (V)")
+    parser.add_argument('--t-load', type=float, default=T_LOAD, help="load torque (N m)")
+    parser.add_argument('--phi', type=float, nargs=3, default=None, metavar=('A', 'B', 'C'),
+                        help="Hall offsets (deg), default from setup_motor_params.m")
+    parser.add_argument('--dt', type=float, default=None, help="step (s), default Ts_motor")
+    parser.add_argument('--record-every', type=int, default=None,
+                        help="keep every n-th step (default: a 10 us output grid; each run costs "
+                             "~120 bytes per recorded sample)")
+    parser.add_argument('--sweep-phi-a', type=float, nargs=3, default=None, metavar=('LO', 'HI', 'N'),
+                        help="run N phi_A offsets (deg) in one ensemble, one file each")
+    parser.add_argument('-e', '--events', action='store_true',
+                        help="adaptive steps between Hall edges instead of fixed steps (--dt sets the output grid)")
+    args = parser.parse_args()
+
+    params = read_motor_params()
+    phi = args.phi
+    if phi is None:
+        phi = [params.get(f'phi_{k}_deg', 0.0) for k in 'ABC']
+    phi = np.atleast_2d(phi)
+    names = [args.output]
+    if args.sweep_phi_a is not None:
+        lo, hi, n = args.sweep_phi_a
+        phi_a = np.linspace(lo, hi, int(n))
+        phi = np.repeat(phi, len(phi_a), axis=0)
+        phi[:, 0] = phi_a
+        stem, ext = os.path.splitext(args.output)
+        names = [f"{stem}_phiA_{a:+.2f}{ext}" for a in phi_a]
+
+    if args.events:
+        runs = []
+        for phi_k in phi:
+            run, info = simulate_events(args.t_end, v_bus=args.v_bus, t_load=args.t_load,
+                                        params=params, phi_deg=phi_k, dt_out=args.dt)
+            print(f"{info['steps']} solver steps, {len(info['edge_times'])} Hall edges")
+            runs.append(run)
+    else:
+        runs = split_runs(simulate_ensemble(args.t_end, phi_deg=phi, v_bus=args.v_bus,
+                                            t_load=args.t_load, params=params, dt=args.dt,
+                                            record_every=args.record_every))
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for name, run in zip(names, runs):
+        out = os.path.join(OUTPUT_DIR, name)
+        save_run(out, run)
+        print(f"Saved {out} ({len(run['time'])} samples, final omega_r {run['omega_r'][-1]:.1f} rad/s)")
+
+
+if __name__ == "__main__":
+    main()
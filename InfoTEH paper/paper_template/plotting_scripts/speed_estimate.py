@@ -3,6 +3,11 @@ import matplotlib.pyplot as plt
 import scipy.io as sio
 from pathlib import Path
 
+from bldc_tools.edges import find_rising_edges
+from bldc_tools.filters import apply_low_pass
+from bldc_tools.lut_speed import compute_speed_lut
+from bldc_tools.plot_lod import lod_plot
+
 def load_mat_data(filepath):
     """Loads the .mat file using pathlib."""
     path_obj = Path(filepath)
@@ -26,56 +31,19 @@ def load_mat_data(filepath):
         print(f"Error loading data: {e}")
         return None
 
-def find_rising_edges(signal):
-    """
-    Finds indices where signal transitions from low (<=0.5) to high (>0.5).
-    """
-    # signal[:-1] checks current state, signal[1:] checks next state
-    rising_edges = (signal[:-1] <= 0.5) & (signal[1:] > 0.5)
-    # Get indices (add 1 to get index of the 'high' value)
-    return np.where(rising_edges)[0] + 1
-
 def compute_speed(time, signal_name, signal, method='fixed', lut_angles_deg=None, lut_shift=0):
     """
     Calculates speed based on Rising Edge intervals (0 -> 1).
     """
     edge_indices = find_rising_edges(signal)
-    
-    if len(edge_indices) < 2:
-        return np.array([]), np.array([])
 
-    est_speed = []
-    est_time = []
-    
-    for i in range(1, len(edge_indices)):
-        idx_curr = edge_indices[i]
-        idx_prev = edge_indices[i-1]
-        
-        dt = time[idx_curr] - time[idx_prev]
-        
-        if dt < 1e-6: continue
-
-        if method == 'lut' and lut_angles_deg is not None:
-            # Cycle through LUT based on edge count + shift
-            lut_idx = (i + lut_shift) % len(lut_angles_deg)
-            deg = lut_angles_deg[lut_idx]
-            d_theta = np.deg2rad(deg)
-        else:
-            d_theta = np.pi / 3.0
-
-        w = d_theta / dt
-        est_speed.append(w)
-        est_time.append(time[idx_curr])
-
-    return np.array(est_time), np.array(est_speed)
-
-def apply_low_pass(data, alpha=0.05):
-    if len(data) == 0: return data
-    filtered = np.zeros_like(data)
-    filtered[0] = data[0]
-    for i in range(1, len(data)):
-        filtered[i] = (alpha * data[i]) + ((1 - alpha) * filtered[i-1])
-    return filtered
+    if method == 'lut' and lut_angles_deg is not None:
+        # Cycle through LUT based on edge count + shift
+        # (edge i closes interval i-1, hence the +1 on the shift)
+        return compute_speed_lut(time, edge_indices, lut_angles_deg, shift=lut_shift + 1)
+
+    # Fixed Pi/3 per sector
+    return compute_speed_lut(time, edge_indices, np.full(6, 60.0))
 
 def main():
     # ================= CONFIGURATION =================
@@ -112,21 +80,21 @@ def main():
     fig1.canvas.manager.set_window_title('Overview: All Estimators')
 
     # Plot 1: Standard
-    axes[0].plot(data['time'], data['omega_r'], 'k-', alpha=0.3, lw=2, label='Real Speed')
+    lod_plot(axes[0], data['time'], data['omega_r'], 'k-', alpha=0.3, lw=2, label='Real Speed')
     axes[0].step(t_hw, w_hw, where='post', label='HW (Fixed 60°)', lw=1.5)
     axes[0].step(t_sw, w_sw, where='post', label='SW (Fixed 60°)', linestyle='--', lw=1.5)
     axes[0].set_title('1. Standard Estimation (Fixed Pi/3)')
     axes[0].legend(loc='lower right')
 
     # Plot 2: Filtered
-    axes[1].plot(data['time'], data['omega_r'], 'k-', alpha=0.3, lw=2, label='Real Speed')
+    lod_plot(axes[1], data['time'], data['omega_r'], 'k-', alpha=0.3, lw=2, label='Real Speed')
     axes[1].step(t_hw, w_hw, where='post', label='HW Raw', alpha=0.5)
     axes[1].plot(t_hw, w_hw_filt, 'r-', lw=2, label=f'HW Filtered (alpha={ALPHA})')
     axes[1].set_title('2. Filtered Estimation')
     axes[1].legend(loc='lower right')
 
     # Plot 3: LUT Small
-    axes[2].plot(data['time'], data['omega_r'], 'k-', alpha=0.3, lw=2, label='Real Speed')
+    lod_plot(axes[2], data['time'], data['omega_r'], 'k-', alpha=0.3, lw=2, label='Real Speed')
     axes[2].step(t_lut_hw, w_lut_hw, where='post', label=f'HW LUT (Shift={LUT_SHIFT_HW})')
     axes[2].set_title('3. LUT Overview')
     axes[2].legend(loc='lower right')
@@ -138,7 +106,7 @@ def main():
     fig2.canvas.manager.set_window_title('Detailed View: LUT Estimation')
 
     # Real Speed (Thick, semi-transparent grey)
-    ax2.plot(data['time'], data['omega_r'], color='black', alpha=0.3, linewidth=3, label='Real Motor Speed (omega_r)')
+    lod_plot(ax2, data['time'], data['omega_r'], color='black', alpha=0.3, linewidth=3, label='Real Motor Speed (omega_r)')
 
     # Hardware LUT (Solid Blue)
     ax2.step(t_lut_hw, w_lut_hw, where='post', color='#1f77b4', linewidth=1.5, 
@@ -1,9 +1,19 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import scipy.io as sio
 from pathlib import Path
 import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bldc_tools.trace_store import load_channels
+from bldc_tools.edges import find_rising_edges
+from bldc_tools.filters import apply_low_pass
+from bldc_tools.lut_speed import compute_speed_lut, speed_all_shifts
+from bldc_tools.lut_alignment import align_lut
+from bldc_tools.lut_calibration import SectorStats
+from bldc_tools.case_runner import run_cases
+from bldc_tools.plot_lod import lod_plot, lod_step
 
 # ================= CONFIGURATION =================
 # Default LUT values (Degrees)
@@ -21,6 +31,9 @@ M3_LUT_DEG = np.array([65.9811, 48.4872, 65.4842, 65.9832, 48.4878, 65.4765])
 OUTPUT_DIR = Path(r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\speed_estimate")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Worker processes for the CASES (None = one per case, up to the CPU count; 1 = sequential)
+MAX_WORKERS = None
+
 CASES = [
     {
         "name": "Default",
@@ -40,58 +53,18 @@ CASES = [
 ]
 
 def load_mat_data(filepath):
-    """Loads the .mat file."""
+    """Loads the run channels (memory-mapped from the trace cache)."""
     path_obj = Path(filepath)
     if not path_obj.exists():
         print(f"Error: File '{path_obj}' not found.")
         return None
     try:
-        data = sio.loadmat(str(path_obj))
-        struct = {
-            'time': data['time'].flatten(),
-            'omega_r': data['omega_r'].flatten(), # Real Speed
-            'hardware_ISR': data['hardware_ISR'].flatten(),
-            'software_ISR': data['software_ISR'].flatten()
-        }
-        return struct
+        # 'omega_r' is the Real Speed
+        return load_channels(path_obj, ['time', 'omega_r', 'hardware_ISR', 'software_ISR'])
     except Exception as e:
         print(f"Error loading {filepath}: {e}")
         return None
 
-def find_rising_edges(signal):
-    """Finds indices where signal transitions from low to high."""
-    return np.where((signal[:-1] <= 0.5) & (signal[1:] > 0.5))[0] + 1
-
-def compute_speed_lut(time, edge_indices, lut_angles_deg, shift=0):
-    """Calculates speed using LUT angles with a specific shift."""
-    if len(edge_indices) < 2:
-        return np.array([]), np.array([])
-    
-    est_speed = []
-    est_time = []
-    
-    for i in range(1, len(edge_indices)):
-        idx_curr = edge_indices[i]
-        idx_prev = edge_indices[i-1]
-        
-        dt = time[idx_curr] - time[idx_prev]
-        if dt < 1e-6: continue
-        
-        # Determine which sector this interval corresponds to
-        # 'i' is the index of the edge. 
-        # For N edges, there are N-1 intervals.
-        # Interval 0 is between edge 0 and edge 1.
-        lut_idx = (i - 1 + shift) % 6 
-        
-        deg = lut_angles_deg[lut_idx]
-        d_theta = np.deg2rad(deg)
-        
-        w = d_theta / dt
-        est_speed.append(w)
-        est_time.append(time[idx_curr])
-        
-    return np.array(est_time), np.array(est_speed)
-
 def compute_ideal_angles_from_data(time, edge_indices, real_speed_signal):
     """
     Reverse engineers the ideal LUT angles.
@@ -100,49 +73,23 @@ def compute_ideal_angles_from_data(time, edge_indices, real_speed_signal):
     if len(edge_indices) < 2:
         return np.zeros(6)
 
-    angle_lists = [[] for _ in range(6)]
-    
-    for i in range(1, len(edge_indices)):
-        idx_curr = edge_indices[i]
-        idx_prev = edge_indices[i-1]
-        
-        dt = time[idx_curr] - time[idx_prev]
-        if dt < 1e-6: continue
-        
-        # Get average real speed during this interval
-        w_real = np.mean(real_speed_signal[idx_prev:idx_curr+1])
-        
-        ideal_deg = w_real * dt * (180.0 / np.pi)
-        
-        # We don't know the absolute sector alignment yet, so we store by modulo sequence
-        # We will align this later or just report it as a sequence.
-        seq_idx = (i - 1) % 6
-        angle_lists[seq_idx].append(ideal_deg)
-        
-    # Average the lists to get the 6 ideal angles (in sequence order)
-    ideal_lut = np.array([np.mean(l) if len(l) > 0 else 60.0 for l in angle_lists])
+    # We don't know the absolute sector alignment yet, so intervals are grouped
+    # by modulo sequence (shift=0). We will align this later.
+    stats = SectorStats().add_run(time, edge_indices, real_speed_signal, shift=0)
+    ideal_lut = stats.lut(default=60.0)
     return ideal_lut
 
-def apply_low_pass(data, alpha=0.05):
-    """Simple IIR Low Pass Filter."""
-    if len(data) == 0: return data
-    filtered = np.zeros_like(data)
-    filtered[0] = data[0]
-    for i in range(1, len(data)):
-        filtered[i] = (alpha * data[i]) + ((1 - alpha) * filtered[i-1])
-    return filtered
-
 def process_case(case_info):
     name = case_info["name"]
     print(f"--- Processing {name} ---")
     data = load_mat_data(case_info["file"])
-    if data is None: return
+    if data is None: return {'name': name, 'error': 'load failed'}
 
     # 1. Get Edges (Using Hardware ISR for accuracy)
     edges = find_rising_edges(data['hardware_ISR'])
     if len(edges) < 10:
         print(f"  Not enough edges found in {name}")
-        return
+        return {'name': name, 'error': 'not enough edges'}
 
     # 2. Calculate PI/3 Speed (Baseline) and Filter it
     t_fixed, w_fixed = compute_speed_lut(data['time'], edges, np.full(6, 60.0), shift=0)
@@ -161,7 +108,7 @@ def process_case(case_info):
     
     # -- Subplot 1: Estimators vs Real Speed (Big Plot) --
     ax_speed = fig.add_subplot(gs[0:2, :])
-    ax_speed.plot(data['time'], data['omega_r'], 'k-', alpha=0.3, lw=3, label='Real Speed (Omega_r)')
+    lod_plot(ax_speed, data['time'], data['omega_r'], 'k-', alpha=0.3, lw=3, label='Real Speed (Omega_r)')
     ax_speed.plot(t_fixed, w_fixed_filt, 'b--', lw=1.5, label='Filtered Pi/3 (Benchmark)')
     
     colors = plt.cm.viridis(np.linspace(0, 1, 6))
@@ -169,29 +116,23 @@ def process_case(case_info):
     # Use the specific LUT for this validation case
     current_lut = case_info["lut_values"]
     
-    best_shift = 0
-    min_error = float('inf')
+    # Score all 6 shifts in closed form (forward rotation only, so the
+    # shift maps directly onto the aligned-ideals plot below)
+    align = align_lut(data['time'], edges, data['omega_r'], current_lut, reverse=False)
+    best_shift = align['shift']
+    print(f"  Best shift {best_shift} (MSE={align['mse']:.2f}), "
+          f"sector residuals: {np.round(align['sector_residuals'], 2)}")
+    
+    # All 6 shifts in one vectorized pass: W_lut[shift] is the estimate for that shift
+    t_lut, W_lut = speed_all_shifts(data['time'], edges, current_lut)
     
     for shift in range(6):
-        t_lut, w_lut = compute_speed_lut(data['time'], edges, current_lut, shift=shift)
-        
-        # Calculate consistency with Real Speed
-        # Interpolate real speed to estimate time points
-        w_real_interp = np.interp(t_lut, data['time'], data['omega_r'])
-        error = np.mean((w_lut - w_real_interp)**2)
-        
-        label = f"LUT Shift {shift}"
-        alpha = 0.5
-        width = 1
-        if error < min_error:
-            min_error = error
-            best_shift = shift
-        
-        ax_speed.step(t_lut, w_lut, where='post', color=colors[shift], alpha=alpha, lw=width, label=label)
+        label = f"LUT Shift {shift} (MSE={align['errors'][0, shift]:.1f})"
+        lod_step(ax_speed, t_lut, W_lut[shift], color=colors[shift], alpha=0.5, lw=1, label=label)
 
     # Highlight best shift
-    t_best, w_best = compute_speed_lut(data['time'], edges, current_lut, shift=best_shift)
-    ax_speed.step(t_best, w_best, where='post', color='r', lw=2, linestyle=':', label=f'Best Shift ({best_shift})')
+    t_best, w_best = t_lut, W_lut[best_shift]
+    lod_step(ax_speed, t_best, w_best, color='r', lw=2, linestyle=':', label=f'Best Shift ({best_shift})')
 
     ax_speed.set_title(f'{name}: Speed Estimation (All offsets)', fontsize=14)
     ax_speed.legend(loc='upper right', ncol=2)
@@ -246,10 +187,25 @@ def process_case(case_info):
     print(f"Saved plot to {save_path}")
     plt.close(fig)
 
+    return {
+        'name': name,
+        'best_shift': best_shift,
+        'mse': align['mse'],
+        'ideal_lut': aligned_ideals,
+        'sector_residuals': align['sector_residuals'],
+        'plot': str(save_path),
+    }
+
 def main():
     print("Starting Speed Estimation Analysis...")
-    for case in CASES:
-        process_case(case)
+    # Each case (load, estimate, plot) runs in its own worker process
+    summaries = run_cases(process_case, CASES, max_workers=MAX_WORKERS)
+    for s in summaries:
+        if 'error' in s:
+            print(f"{s['name']}: {s['error']}")
+        else:
+            print(f"{s['name']}: best shift {s['best_shift']}, MSE {s['mse']:.2f}, "
+                  f"ideal LUT {np.round(s['ideal_lut'], 3)}")
     print("Done.")
 
 if __name__ == "__main__":
@@ -1,8 +1,15 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import scipy.io as sio
 from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bldc_tools.trace_store import load_channels
+from bldc_tools.edges import find_rising_edges
+from bldc_tools.lut_speed import compute_speed_lut
+from bldc_tools.lut_alignment import align_lut
+from bldc_tools.lut_calibration import SectorStats
 
 # ================= CONFIGURATION =================
 FILE_M3 = r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\mat_files\speed_estimation_test_M3.mat"
@@ -13,65 +20,22 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 M3_LUT_RAD_USER = np.array([1.0500, 0.9454, 1.1459, 1.0499, 0.9453, 1.1459])
 M3_LUT_DEG_USER = np.rad2deg(M3_LUT_RAD_USER)
 
+# Ideal angle per interval: 'mean' (sample mean of omega_r * dt) or
+# 'trapz' (trapezoidal integral of omega_r between edges, also valid in transients)
+IDEAL_METHOD = 'mean'
+
 def load_mat_data(filepath):
     try:
-        data = sio.loadmat(filepath)
-        return {
-            'time': data['time'].flatten(),
-            'omega_r': data['omega_r'].flatten(),
-            'hardware_ISR': data['hardware_ISR'].flatten()
-        }
+        return load_channels(filepath, ['time', 'omega_r', 'hardware_ISR'])
     except Exception as e:
         print(f"Error: {e}")
         return None
 
-def find_rising_edges(signal):
-    return np.where((signal[:-1] <= 0.5) & (signal[1:] > 0.5))[0] + 1
-
-def compute_speed_lut(time, edge_indices, lut_angles_deg, shift=0):
-    if len(edge_indices) < 2: return np.array([]), np.array([])
-    
-    est_speed = []
-    est_time = []
-    
-    for i in range(1, len(edge_indices)):
-        idx_curr = edge_indices[i]
-        idx_prev = edge_indices[i-1]
-        dt = time[idx_curr] - time[idx_prev]
-        if dt < 1e-6: continue
-        
-        # Determine sector index
-        lut_idx = (i - 1 + shift) % 6
-        deg = lut_angles_deg[lut_idx]
-        w = np.deg2rad(deg) / dt
-        
-        est_speed.append(w)
-        est_time.append(time[idx_curr])
-        
-    return np.array(est_time), np.array(est_speed)
-
-def compute_ideal_angles(time, edge_indices, real_speed, shift=0):
+def compute_ideal_angles(time, edge_indices, real_speed, shift=0, method=IDEAL_METHOD):
     # Calculate what the angle SHOULD be to match the average speed
     # Then group by sector index (0..5) and average them to get the Ideal LUT
-    
-    sector_angles = [[] for _ in range(6)]
-    
-    for i in range(1, len(edge_indices)):
-        idx_curr = edge_indices[i]
-        idx_prev = edge_indices[i-1]
-        dt = time[idx_curr] - time[idx_prev]
-        
-        # Get true average speed in this interval
-        w_avg = np.mean(real_speed[idx_prev:idx_curr+1])
-        
-        # Ideal Angle = w * dt
-        angle_deg = np.rad2deg(w_avg * dt)
-        
-        lut_idx = (i - 1 + shift) % 6
-        sector_angles[lut_idx].append(angle_deg)
-        
-    ideal_lut = np.array([np.mean(vals) for vals in sector_angles])
-    return ideal_lut
+    stats = SectorStats().add_run(time, edge_indices, real_speed, shift=shift, min_dt=0.0, method=method)
+    return stats.lut(default=np.nan)
 
 def main():
     print("Loading M3 Data...")
@@ -81,22 +45,13 @@ def main():
     edges = find_rising_edges(data['hardware_ISR'])
     
     # 1. Determine Best Shift for User LUT
-    # (We iterate to ensure we are comparing apples to apples)
-    best_shift = 0
-    min_err = float('inf')
-    
+    # (Closed-form score of all shifts, so we compare apples to apples)
     # We'll also calculate Ideal LUT for the BEST shift
     # Because Ideal LUT depends on which physical sector maps to index 0
     
     print("Finding best shift for User LUT...")
-    for s in range(6):
-        t, w = compute_speed_lut(data['time'], edges, M3_LUT_DEG_USER, shift=s)
-        # Compare to real speed
-        w_real = np.interp(t, data['time'], data['omega_r'])
-        err = np.mean((w - w_real)**2)
-        if err < min_err:
-            min_err = err
-            best_shift = s
+    align = align_lut(data['time'], edges, data['omega_r'], M3_LUT_DEG_USER, reverse=False)
+    best_shift = align['shift']
     
     print(f"Best Shift for User LUT: {best_shift}")
     
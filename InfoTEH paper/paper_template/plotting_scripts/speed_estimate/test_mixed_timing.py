@@ -1,8 +1,11 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import scipy.io as sio
 from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bldc_tools.trace_store import load_channels
 
 # ================= CONFIGURATION =================
 FILE_M3 = r"d:\Repository\ELEC_499B\InfoTEH paper\paper_template\plotting_scripts\mat_files\speed_estimation_test_M3.mat"
@@ -14,13 +17,7 @@ M3_LUT_DEG = np.array([65.9811, 48.4872, 65.4842, 65.9832, 48.4878, 65.4765])
 
 def load_mat_data(filepath):
     try:
-        data = sio.loadmat(filepath)
-        return {
-            'time': data['time'].flatten(),
-            'omega_r': data['omega_r'].flatten(),
-            'hardware_ISR': data['hardware_ISR'].flatten(),
-            'software_ISR': data['software_ISR'].flatten()
-        }
+        return load_channels(filepath, ['time', 'omega_r', 'hardware_ISR', 'software_ISR'])
     except Exception as e:
         print(f"Error: {e}")
         return None